@@ -1,605 +1,827 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import argparse
-import json
-import os
-import sys
-import time
-from base64 import b64decode
-from hashlib import sha1
-from math import ceil
-from mimetypes import guess_type
-from pathlib import Path
-import getpass
-import requests
-
-
-class AcFunUploader:
-    def __init__(self):
-        self.session = requests.Session()
-        # 设置通用请求头
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "zh-CN,zh;q=0.9",
-            "Origin": "https://member.acfun.cn",
-            "Referer": "https://member.acfun.cn/"
-        })
-        
-        # API 端点
-        self.LOGIN_URL = "https://id.app.acfun.cn/rest/web/login/signin"
-        self.TOKEN_URL = "https://member.acfun.cn/video/api/getKSCloudToken"
-        self.FRAGMENT_URL = "https://upload.kuaishouzt.com/api/upload/fragment"
-        self.COMPLETE_URL = "https://upload.kuaishouzt.com/api/upload/complete"
-        self.FINISH_URL = "https://member.acfun.cn/video/api/uploadFinish"
-        self.C_VIDEO_URL = "https://member.acfun.cn/video/api/createVideo"
-        self.C_DOUGA_URL = "https://member.acfun.cn/video/api/createDouga"
-        self.QINIU_URL = "https://member.acfun.cn/common/api/getQiniuToken"
-        self.COVER_URL = "https://member.acfun.cn/common/api/getUrlAfterUpload"
-
-    def log(self, *msg):
-        """输出日志信息"""
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        print(f'[{timestamp}]', *msg)
-
-    def calc_sha1(self, data: bytes) -> str:
-        """计算数据的SHA1哈希值"""
-        sha1_obj = sha1()
-        sha1_obj.update(data)
-        return sha1_obj.hexdigest()
-
-    def load_cookies(self, cookie_file: str) -> bool:
-        """从文件加载cookie，支持Netscape和JSON格式"""
-        try:
-            if not os.path.exists(cookie_file):
-                self.log(f"Cookie文件不存在: {cookie_file}")
-                return False
-            
-            with open(cookie_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-            
-            # 判断文件格式
-            if content.startswith('# Netscape HTTP Cookie File') or '\t' in content:
-                # Netscape格式
-                cookie_count = self._load_netscape_cookies(content)
-                self.log(f"从Netscape格式文件加载了 {cookie_count} 个cookie")
-            else:
-                # JSON格式
-                cookies_data = json.loads(content)
-                for cookie in cookies_data:
-                    self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
-                self.log(f"从JSON格式文件加载了 {len(cookies_data)} 个cookie")
-            
-            # 测试cookie是否有效
-            return self.test_login()
-        except Exception as e:
-            self.log(f"加载cookie文件失败: {e}")
-            return False
-
-    def _load_netscape_cookies(self, content: str) -> int:
-        """加载Netscape格式的cookie"""
-        lines = content.split('\n')
-        cookie_count = 0
-        
-        for line in lines:
-            line = line.strip()
-            # 跳过注释和空行
-            if not line or line.startswith('#'):
-                continue
-            
-            # Netscape格式: domain	flag	path	secure	expiration	name	value
-            parts = line.split('\t')
-            if len(parts) >= 7:
-                domain = parts[0]
-                path = parts[2]
-                secure = parts[3].upper() == 'TRUE'
-                expiration = parts[4]
-                name = parts[5]
-                value = parts[6]
-                
-                # 设置cookie
-                self.session.cookies.set(
-                    name=name,
-                    value=value,
-                    domain=domain,
-                    path=path,
-                    secure=secure
-                )
-                cookie_count += 1
-        
-        return cookie_count
-
-    def save_cookies(self, cookie_file: str):
-        """保存cookie到文件"""
-        try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(cookie_file), exist_ok=True)
-            
-            cookies_data = []
-            for cookie in self.session.cookies:
-                cookies_data.append({
-                    'name': cookie.name,
-                    'value': cookie.value,
-                    'domain': cookie.domain,
-                    'path': cookie.path
-                })
-            
-            with open(cookie_file, 'w', encoding='utf-8') as f:
-                json.dump(cookies_data, f, ensure_ascii=False, indent=2)
-            
-            self.log(f"Cookie已保存到: {cookie_file}")
-        except Exception as e:
-            self.log(f"保存cookie失败: {e}")
-
-    def test_network_connectivity(self) -> bool:
-        """测试网络连接"""
-        test_urls = [
-            "https://www.acfun.cn",
-            "https://member.acfun.cn",
-            "https://upload.kuaishouzt.com"
-        ]
-        
-        for url in test_urls:
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    self.log(f"网络连接正常: {url}")
-                else:
-                    self.log(f"网络连接异常: {url} (状态码: {response.status_code})")
-                    return False
-            except Exception as e:
-                self.log(f"网络连接失败: {url} ({e})")
-                return False
-        
-        return True
-
-    def test_login(self) -> bool:
-        """测试登录状态"""
-        try:
-            # 使用一个简单的API来测试登录状态
-            response = self.session.get("https://member.acfun.cn/video/api/getMyChannels")
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    return result.get('result') == 0
-                except:
-                    # 如果不是JSON，可能是HTML页面，检查是否是登录页面
-                    if "login" in response.text.lower() or "登录" in response.text:
-                        return False
-                    # 如果是其他HTML页面（如创作中心），说明已登录
-                    return True
-            return False
-        except Exception as e:
-            return False
-
-    def login(self, username: str, password: str) -> bool:
-        """用户名密码登录"""
-        try:
-            response = self.session.post(
-                self.LOGIN_URL,
-                data={
-                    'username': username,
-                    'password': password,
-                    'key': '',
-                    'captcha': ''
-                }
-            )
-            
-            result = response.json()
-            if result.get('result') == 0:
-                self.log('登录成功')
-                return True
-            else:
-                self.log(f"登录失败: {result.get('error_msg', '账号密码错误')}")
-                return False
-        except Exception as e:
-            self.log(f"登录过程中出错: {e}")
-            return False
-
-    def get_token(self, filename: str, filesize: int) -> tuple:
-        """获取上传token"""
-        response = self.session.post(
-            self.TOKEN_URL,
-            data={
-                "fileName": filename,
-                "size": filesize,
-                "template": "1"
-            }
-        )
-        result = response.json()
-        return result["taskId"], result["token"], result["uploadConfig"]["partSize"]
-
-    def upload_chunk(self, block: bytes, fragment_id: int, upload_token: str) -> bool:
-        """上传分块"""
-        import ssl
-        import time
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-        
-        # 创建专用的上传session
-        upload_session = requests.Session()
-        
-        # 配置重试策略
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        
-        # 配置适配器
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        upload_session.mount("http://", adapter)
-        upload_session.mount("https://", adapter)
-        
-        # 设置请求头
-        headers = {
-            "Content-Type": "application/octet-stream",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive"
-        }
-        
-        for attempt in range(3):
-            try:
-                # 添加延迟避免请求过快
-                if attempt > 0:
-                    time.sleep(2 ** attempt)  # 指数退避
-                
-                # 第一次尝试使用标准SSL
-                verify_ssl = True if attempt == 0 else False
-                
-                response = upload_session.post(
-                    self.FRAGMENT_URL,
-                    params={
-                        "fragment_id": fragment_id,
-                        "upload_token": upload_token
-                    },
-                    data=block,
-                    headers=headers,
-                    timeout=(30, 120),  # (连接超时, 读取超时)
-                    verify=verify_ssl,  # 第一次验证SSL，后续尝试跳过验证
-                    stream=False
-                )
-                
-                # 检查响应
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("result") == 1:
-                        self.log(f"分块 {fragment_id + 1} 上传成功")
-                        return True
-                    else:
-                        self.log(f"分块 {fragment_id + 1} 上传失败: {result}")
-                else:
-                    self.log(f"分块 {fragment_id + 1} HTTP错误: {response.status_code}")
-                    
-            except ssl.SSLError as e:
-                self.log(f"分块 {fragment_id + 1} SSL错误，重试第 {attempt + 1} 次: {e}")
-                if attempt == 2:  # 最后一次尝试
-                    self.log("SSL连接持续失败，可能是网络问题或防火墙阻拦")
-            except requests.exceptions.Timeout as e:
-                self.log(f"分块 {fragment_id + 1} 超时，重试第 {attempt + 1} 次: {e}")
-            except requests.exceptions.ConnectionError as e:
-                self.log(f"分块 {fragment_id + 1} 连接错误，重试第 {attempt + 1} 次: {e}")
-            except Exception as e:
-                self.log(f"分块 {fragment_id + 1} 未知错误，重试第 {attempt + 1} 次: {e}")
-        
-        return False
-
-    def complete_upload(self, fragment_count: int, upload_token: str):
-        """完成上传"""
-        import time
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-        
-        # 创建专用的上传session
-        upload_session = requests.Session()
-        
-        # 配置重试策略
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        
-        # 配置适配器
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        upload_session.mount("http://", adapter)
-        upload_session.mount("https://", adapter)
-        
-        headers = {
-            "Content-Length": "0",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Connection": "keep-alive"
-        }
-        
-        for attempt in range(3):
-            try:
-                if attempt > 0:
-                    time.sleep(2 ** attempt)
-                
-                response = upload_session.post(
-                    self.COMPLETE_URL,
-                    params={
-                        "fragment_count": fragment_count,
-                        "upload_token": upload_token
-                    },
-                    headers=headers,
-                    timeout=(30, 60),
-                    verify=True
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("result") == 1:
-                        self.log("上传完成确认成功")
-                        return
-                    else:
-                        self.log(f"完成上传失败: {result}")
-                else:
-                    self.log(f"完成上传HTTP错误: {response.status_code}")
-                    
-            except Exception as e:
-                self.log(f"完成上传出错，重试第 {attempt + 1} 次: {e}")
-                if attempt == 2:
-                    self.log("完成上传失败，但文件可能已上传成功")
-
-    def upload_finish(self, task_id: int):
-        """上传完成处理"""
-        response = self.session.post(
-            self.FINISH_URL,
-            data={"taskId": task_id}
-        )
-        
-        if response.json()["result"] != 0:
-            self.log(f"上传完成处理失败: {response.text}")
-
-    def create_video(self, video_key: int, filename: str) -> int:
-        """创建视频"""
-        response = self.session.post(
-            self.C_VIDEO_URL,
-            data={
-                "videoKey": video_key,
-                "fileName": filename,
-                "vodType": "ksCloud"
-            },
-            headers={
-                "origin": "https://member.acfun.cn",
-                "referer": "https://member.acfun.cn/upload-video"
-            }
-        )
-        
-        result = response.json()
-        if result["result"] != 0:
-            self.log(f"创建视频失败: {response.text}")
-            return None
-        
-        self.upload_finish(video_key)
-        return result["videoId"]
-
-    def upload_cover(self, image_path: str) -> str:
-        """上传封面图片"""
-        # 生成随机文件名
-        import random
-        import string
-        
-        file_name = ''.join(random.choices(string.ascii_letters + string.digits, k=16))
-        
-        # 获取七牛token
-        response = self.session.post(
-            self.QINIU_URL,
-            data={"fileName": f"{file_name}.jpeg"}
-        )
-        
-        token = response.json()["info"]["token"]
-        
-        # 上传图片
-        with open(image_path, "rb") as f:
-            chunk_data = f.read()
-        
-        self.upload_chunk(chunk_data, 0, token)
-        self.complete_upload(1, token)
-        
-        # 获取上传后的URL
-        response = self.session.post(
-            self.COVER_URL,
-            data={"bizFlag": "web-douga-cover", "token": token}
-        )
-        
-        return response.json()["url"]
-
-    def create_douga(self, file_path: str, title: str, channel_id: int, cover_path: str,
-                     desc: str = "", tags: list = None, creation_type: int = 3, 
-                     original_url: str = ""):
-        """创建投稿"""
-        if tags is None:
-            tags = []
-        
-        file_name = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        
-        # 获取上传token
-        task_id, token, part_size = self.get_token(file_name, file_size)
-        fragment_count = ceil(file_size / part_size)
-        
-        self.log(f"开始上传 {file_name}，共 {fragment_count} 个分块")
-        
-        # 上传视频文件
-        with open(file_path, "rb") as f:
-            for fragment_id in range(fragment_count):
-                chunk_data = f.read(part_size)
-                if not chunk_data:
-                    break
-                
-                if not self.upload_chunk(chunk_data, fragment_id, token):
-                    self.log(f"分块 {fragment_id + 1} 上传失败")
-                    return False
-        
-        # 完成上传
-        self.complete_upload(fragment_count, token)
-        
-        # 创建视频
-        video_id = self.create_video(task_id, file_name)
-        if not video_id:
-            return False
-        
-        # 上传封面
-        cover_url = self.upload_cover(cover_path)
-        
-        # 创建投稿
-        data = {
-            "title": title,
-            "description": desc,
-            "tagNames": json.dumps(tags),
-            "creationType": creation_type,
-            "channelId": channel_id,
-            "coverUrl": cover_url,
-            "videoInfos": json.dumps([{"videoId": video_id, "title": title}]),
-            "isJoinUpCollege": "0"
-        }
-        
-        if creation_type == 1:  # 转载
-            data["originalLinkUrl"] = original_url
-            data["originalDeclare"] = "0"
-        else:  # 原创
-            data["originalDeclare"] = "1"
-        
-        response = self.session.post(
-            self.C_DOUGA_URL,
-            data=data,
-            headers={
-                "origin": "https://member.acfun.cn",
-                "referer": "https://member.acfun.cn/upload-video"
-            }
-        )
-        
-        result = response.json()
-        if result["result"] == 0 and "dougaId" in result:
-            self.log(f"视频投稿成功！AC号：{result['dougaId']}")
-            return True
-        else:
-            self.log(f"视频投稿失败: {response.text}")
-            return False
-
-
-def main():
-    parser = argparse.ArgumentParser(
-        description="AcFun 命令行投稿工具",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-使用示例:
-  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63
-  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63 -u username -p password
-  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63 --tags "游戏" "实况"
-        """
-    )
-    
-    parser.add_argument("file_path", help="视频文件路径")
-    parser.add_argument("-c", "--cover", required=True, help="封面图片路径")
-    parser.add_argument("-t", "--title", required=True, help="稿件标题")
-    parser.add_argument("--cid", "--channel_id", type=int, required=True, help="频道ID")
-    parser.add_argument("-d", "--desc", default="", help="稿件简介")
-    parser.add_argument("--tags", nargs="*", default=[], help="稿件标签")
-    parser.add_argument("--type", type=int, choices=[1, 3], default=3, 
-                       help="创作类型 (1:转载, 3:原创)")
-    parser.add_argument("--original_url", default="", help="转载来源URL (仅转载时需要)")
-    parser.add_argument("-u", "--username", help="AcFun用户名")
-    parser.add_argument("-p", "--password", help="AcFun密码")
-    parser.add_argument("--cookie_file", default="cookies/ac_cookies.txt", 
-                       help="Cookie文件路径")
-    
-    args = parser.parse_args()
-    
-    # 检查文件是否存在
-    if not os.path.exists(args.file_path):
-        print(f"错误: 视频文件不存在: {args.file_path}")
-        sys.exit(1)
-    
-    if not os.path.exists(args.cover):
-        print(f"错误: 封面文件不存在: {args.cover}")
-        sys.exit(1)
-    
-    # 创建上传器
-    uploader = AcFunUploader()
-    
-    # 尝试登录
-    logged_in = False
-    
-    # 首先尝试使用cookie登录
-    if uploader.load_cookies(args.cookie_file):
-        uploader.log("使用Cookie登录成功")
-        logged_in = True
-    
-    # 如果cookie登录失败，尝试用户名密码登录
-    if not logged_in:
-        username = args.username
-        password = args.password
-        
-        if not username:
-            username = input("请输入AcFun用户名: ")
-        
-        if not password:
-            password = getpass.getpass("请输入AcFun密码: ")
-        
-        if uploader.login(username, password):
-            logged_in = True
-            # 保存新的cookie
-            uploader.save_cookies(args.cookie_file)
-        else:
-            print("登录失败，请检查用户名和密码")
-            sys.exit(1)
-    
-    if not logged_in:
-        print("登录失败")
-        sys.exit(1)
-    
-    # 测试网络连接
-    uploader.log("正在测试网络连接...")
-    if not uploader.test_network_connectivity():
-        print("\n网络连接测试失败！")
-        print("可能的解决方案:")
-        print("1. 检查网络连接是否正常")
-        print("2. 检查防火墙设置")
-        print("3. 尝试使用VPN或更换网络环境")
-        print("4. 检查DNS设置")
-        
-        choice = input("\n是否继续尝试上传? (y/N): ").lower().strip()
-        if choice not in ['y', 'yes']:
-            print("已取消上传")
-            sys.exit(1)
-    
-    # 执行上传
-    uploader.log("开始上传流程...")
-    success = uploader.create_douga(
-        file_path=args.file_path,
-        title=args.title,
-        channel_id=args.cid,
-        cover_path=args.cover,
-        desc=args.desc,
-        tags=args.tags,
-        creation_type=args.type,
-        original_url=args.original_url
-    )
-    
-    if success:
-        uploader.log("上传完成！")
-        print("\n🎉 视频上传成功！")
-    else:
-        uploader.log("上传失败")
-        print("\n❌ 上传失败，可能的原因:")
-        print("1. 网络连接不稳定")
-        print("2. 文件格式不支持")
-        print("3. 文件过大")
-        print("4. 服务器临时故障")
-        print("\n建议:")
-        print("- 检查网络连接")
-        print("- 稍后重试")
-        print("- 确认视频文件格式正确")
-        sys.exit(1)
-
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+import time
+from base64 import b64decode
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from hashlib import sha1
+from math import ceil
+from mimetypes import guess_type
+from pathlib import Path
+import getpass
+import requests
+
+from credential_store import CredentialStore
+from media_check import check_media, check_media_many, describe
+from job_queue import JobQueue
+from memory_budget import global_budget, parse_size
+from status_tracker import SubmissionTracker
+from upload_transport import TRANSPORT_MODES, UploadTransport
+
+
+class AcFunUploader:
+    def __init__(self, transport: str = "http1"):
+        self.session = requests.Session()
+        # 设置通用请求头
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "zh-CN,zh;q=0.9",
+            "Origin": "https://member.acfun.cn",
+            "Referer": "https://member.acfun.cn/"
+        })
+        
+        # API 端点
+        self.LOGIN_URL = "https://id.app.acfun.cn/rest/web/login/signin"
+        self.TOKEN_URL = "https://member.acfun.cn/video/api/getKSCloudToken"
+        self.FRAGMENT_URL = "https://upload.kuaishouzt.com/api/upload/fragment"
+        self.COMPLETE_URL = "https://upload.kuaishouzt.com/api/upload/complete"
+        self.FINISH_URL = "https://member.acfun.cn/video/api/uploadFinish"
+        self.C_VIDEO_URL = "https://member.acfun.cn/video/api/createVideo"
+        self.C_DOUGA_URL = "https://member.acfun.cn/video/api/createDouga"
+        self.QINIU_URL = "https://member.acfun.cn/common/api/getQiniuToken"
+        self.COVER_URL = "https://member.acfun.cn/common/api/getUrlAfterUpload"
+        
+        # 分块上传和完成上传共用的传输层 (连接池 / HTTP/2 多路复用)
+        self.upload_transport = UploadTransport(transport, log=self.log)
+        
+        # 单个视频同时在传的分块数
+        self.fragment_workers = 1
+        
+        # 分块和封面缓冲区在分配前需从该预算申请，限制进程内的在途内存
+        self.byte_budget = global_budget
+        
+        # 调用 createDouga 前的检查，返回 False 时放弃投稿 (如多节点任务租约已丢失)
+        self.before_submit = None
+        
+        # 投稿成功后的回调 (dougaId, video_infos)，用于记录待跟踪的稿件
+        self.after_submit = None
+        
+        # 上传前校验视频容器结构
+        self.check_media = True
+        
+        # Cookie 验证通过后在此时间内(秒)免于重复调用 test_login
+        self.cookie_ttl = 600
+        
+        # 最近一次 load_cookies 读取到的cookie内容指纹
+        self.cookie_fingerprint = None
+
+    def log(self, *msg):
+        """输出日志信息"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        print(f'[{timestamp}]', *msg)
+
+    def calc_sha1(self, data: bytes) -> str:
+        """计算数据的SHA1哈希值"""
+        sha1_obj = sha1()
+        sha1_obj.update(data)
+        return sha1_obj.hexdigest()
+
+    def load_cookies(self, cookie_file: str) -> bool:
+        """从文件加载cookie，支持Netscape和JSON格式"""
+        self.cookie_fingerprint = None
+        try:
+            store = CredentialStore(cookie_file, self.cookie_ttl)
+            # 写入方使用原子替换，读取无需加锁
+            content = store.read()
+            if content is None:
+                self.log(f"Cookie文件不存在: {cookie_file}")
+                return False
+            self.cookie_fingerprint = store.fingerprint(content)
+            
+            # 判断文件格式
+            if content.startswith('# Netscape HTTP Cookie File') or '\t' in content:
+                # Netscape格式
+                cookie_count = self._load_netscape_cookies(content)
+                self.log(f"从Netscape格式文件加载了 {cookie_count} 个cookie")
+            else:
+                # JSON格式
+                cookies_data = json.loads(content)
+                for cookie in cookies_data:
+                    self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
+                self.log(f"从JSON格式文件加载了 {len(cookies_data)} 个cookie")
+            
+            # 近期已验证过的cookie直接复用，避免每个进程都请求一次
+            if store.is_fresh(content):
+                self.log("Cookie在有效期内，跳过登录验证")
+                return True
+            
+            # 测试cookie是否有效
+            if self.test_login():
+                store.mark_valid(content)
+                return True
+            return False
+        except Exception as e:
+            self.log(f"加载cookie文件失败: {e}")
+            return False
+
+    def _load_netscape_cookies(self, content: str) -> int:
+        """加载Netscape格式的cookie"""
+        lines = content.split('\n')
+        cookie_count = 0
+        
+        for line in lines:
+            line = line.strip()
+            # 跳过注释和空行
+            if not line or line.startswith('#'):
+                continue
+            
+            # Netscape格式: domain	flag	path	secure	expiration	name	value
+            parts = line.split('\t')
+            if len(parts) >= 7:
+                domain = parts[0]
+                path = parts[2]
+                secure = parts[3].upper() == 'TRUE'
+                expiration = parts[4]
+                name = parts[5]
+                value = parts[6]
+                
+                # 设置cookie
+                self.session.cookies.set(
+                    name=name,
+                    value=value,
+                    domain=domain,
+                    path=path,
+                    secure=secure
+                )
+                cookie_count += 1
+        
+        return cookie_count
+
+    def save_cookies(self, cookie_file: str):
+        """保存cookie到文件"""
+        try:
+            cookies_data = []
+            for cookie in self.session.cookies:
+                cookies_data.append({
+                    'name': cookie.name,
+                    'value': cookie.value,
+                    'domain': cookie.domain,
+                    'path': cookie.path
+                })
+            
+            # 加锁并原子替换，避免并发进程互相覆盖
+            CredentialStore(cookie_file, self.cookie_ttl).write(cookies_data)
+            
+            self.log(f"Cookie已保存到: {cookie_file}")
+        except Exception as e:
+            self.log(f"保存cookie失败: {e}")
+
+    def test_network_connectivity(self) -> bool:
+        """测试网络连接"""
+        test_urls = [
+            "https://www.acfun.cn",
+            "https://member.acfun.cn",
+            "https://upload.kuaishouzt.com"
+        ]
+        
+        for url in test_urls:
+            try:
+                response = requests.get(url, timeout=10)
+                if response.status_code == 200:
+                    self.log(f"网络连接正常: {url}")
+                else:
+                    self.log(f"网络连接异常: {url} (状态码: {response.status_code})")
+                    return False
+            except Exception as e:
+                self.log(f"网络连接失败: {url} ({e})")
+                return False
+        
+        return True
+
+    def test_login(self) -> bool:
+        """测试登录状态"""
+        try:
+            # 使用一个简单的API来测试登录状态
+            response = self.session.get("https://member.acfun.cn/video/api/getMyChannels")
+            
+            if response.status_code == 200:
+                try:
+                    result = response.json()
+                    return result.get('result') == 0
+                except:
+                    # 如果不是JSON，可能是HTML页面，检查是否是登录页面
+                    if "login" in response.text.lower() or "登录" in response.text:
+                        return False
+                    # 如果是其他HTML页面（如创作中心），说明已登录
+                    return True
+            return False
+        except Exception as e:
+            return False
+
+    def login(self, username: str, password: str) -> bool:
+        """用户名密码登录"""
+        try:
+            response = self.session.post(
+                self.LOGIN_URL,
+                data={
+                    'username': username,
+                    'password': password,
+                    'key': '',
+                    'captcha': ''
+                }
+            )
+            
+            result = response.json()
+            if result.get('result') == 0:
+                self.log('登录成功')
+                return True
+            else:
+                self.log(f"登录失败: {result.get('error_msg', '账号密码错误')}")
+                return False
+        except Exception as e:
+            self.log(f"登录过程中出错: {e}")
+            return False
+
+    def ensure_login(self, cookie_file: str, get_credentials) -> bool:
+        """确保处于登录状态
+
+        cookie 失效时只允许一个进程重新登录：其余进程在锁上等待，
+        拿到锁后若发现cookie已被刷新则直接复用；若其他进程刚刚密码登录失败，
+        则直接返回 False，避免多个进程重复尝试导致账号被锁定。
+        get_credentials 返回 (用户名, 密码)，只有在确实需要密码登录时才会被调用
+        """
+        if self.load_cookies(cookie_file):
+            self.log("使用Cookie登录成功")
+            return True
+        
+        # 以实际验证失败的内容为准，验证期间其他进程写入的新cookie不会被误判为失效
+        store = CredentialStore(cookie_file, self.cookie_ttl)
+        stale = self.cookie_fingerprint
+        
+        with store.lock():
+            current = store.fingerprint()
+            if current != stale and self.load_cookies(cookie_file):
+                self.log("Cookie已被其他进程刷新，复用新的登录状态")
+                return True
+            
+            if store.recently_failed(current):
+                self.log("其他进程刚刚使用密码登录失败，为避免账号被锁定不再重复尝试")
+                return False
+            
+            username, password = get_credentials()
+            if not self.login(username, password):
+                store.mark_failed(current)
+                return False
+            
+            # 保存新的cookie
+            self.save_cookies(cookie_file)
+            return True
+
+    def get_token(self, filename: str, filesize: int) -> tuple:
+        """获取上传token"""
+        response = self.session.post(
+            self.TOKEN_URL,
+            data={
+                "fileName": filename,
+                "size": filesize,
+                "template": "1"
+            }
+        )
+        result = response.json()
+        return result["taskId"], result["token"], result["uploadConfig"]["partSize"]
+
+    def upload_chunk(self, block: bytes, fragment_id: int, upload_token: str) -> bool:
+        """上传分块"""
+        import ssl
+        
+        # 设置请求头
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+            "Accept": "*/*",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive"
+        }
+        
+        for attempt in range(3):
+            try:
+                # 添加延迟避免请求过快
+                if attempt > 0:
+                    time.sleep(2 ** attempt)  # 指数退避
+                
+                # 第一次尝试使用标准SSL
+                verify_ssl = True if attempt == 0 else False
+                
+                response = self.upload_transport.post(
+                    self.FRAGMENT_URL,
+                    params={
+                        "fragment_id": fragment_id,
+                        "upload_token": upload_token
+                    },
+                    data=block,
+                    headers=headers,
+                    timeout=(30, 120),  # (连接超时, 读取超时)
+                    verify=verify_ssl  # 第一次验证SSL，后续尝试跳过验证
+                )
+                
+                # 检查响应
+                if response.status_code == 200:
+                    result = response.json()
+                    if result.get("result") == 1:
+                        self.log(f"分块 {fragment_id + 1} 上传成功")
+                        return True
+                    else:
+                        self.log(f"分块 {fragment_id + 1} 上传失败: {result}")
+                else:
+                    self.log(f"分块 {fragment_id + 1} HTTP错误: {response.status_code}")
+                    
+            except ssl.SSLError as e:
+                self.log(f"分块 {fragment_id + 1} SSL错误，重试第 {attempt + 1} 次: {e}")
+                if attempt == 2:  # 最后一次尝试
+                    self.log("SSL连接持续失败，可能是网络问题或防火墙阻拦")
+            except requests.exceptions.Timeout as e:
+                self.log(f"分块 {fragment_id + 1} 超时，重试第 {attempt + 1} 次: {e}")
+            except requests.exceptions.ConnectionError as e:
+                self.log(f"分块 {fragment_id + 1} 连接错误，重试第 {attempt + 1} 次: {e}")
+            except Exception as e:
+                self.log(f"分块 {fragment_id + 1} 未知错误，重试第 {attempt + 1} 次: {e}")
+        
+        return False
+
+    def complete_upload(self, fragment_count: int, upload_token: str):
+        """完成上传"""
+        headers = {
+            "Content-Length": "0",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+            "Accept": "*/*",
+            "Connection": "keep-alive"
+        }
+        
+        for attempt in range(3):
+            try:
+                if attempt > 0:
+                    time.sleep(2 ** attempt)
+                
+                response = self.upload_transport.post(
+                    self.COMPLETE_URL,
+                    params={
+                        "fragment_count": fragment_count,
+                        "upload_token": upload_token
+                    },
+                    headers=headers,
+                    timeout=(30, 60),
+                    verify=True
+                )
+                
+                if response.status_code == 200:
+                    result = response.json()
+                    if result.get("result") == 1:
+                        self.log("上传完成确认成功")
+                        return
+                    else:
+                        self.log(f"完成上传失败: {result}")
+                else:
+                    self.log(f"完成上传HTTP错误: {response.status_code}")
+                    
+            except Exception as e:
+                self.log(f"完成上传出错，重试第 {attempt + 1} 次: {e}")
+                if attempt == 2:
+                    self.log("完成上传失败，但文件可能已上传成功")
+
+    def upload_finish(self, task_id: int):
+        """上传完成处理"""
+        response = self.session.post(
+            self.FINISH_URL,
+            data={"taskId": task_id}
+        )
+        
+        if response.json()["result"] != 0:
+            self.log(f"上传完成处理失败: {response.text}")
+
+    def create_video(self, video_key: int, filename: str) -> int:
+        """创建视频"""
+        response = self.session.post(
+            self.C_VIDEO_URL,
+            data={
+                "videoKey": video_key,
+                "fileName": filename,
+                "vodType": "ksCloud"
+            },
+            headers={
+                "origin": "https://member.acfun.cn",
+                "referer": "https://member.acfun.cn/upload-video"
+            }
+        )
+        
+        result = response.json()
+        if result["result"] != 0:
+            self.log(f"创建视频失败: {response.text}")
+            return None
+        
+        self.upload_finish(video_key)
+        return result["videoId"]
+
+    def upload_cover(self, image_path: str) -> str:
+        """上传封面图片"""
+        # 生成随机文件名
+        import random
+        import string
+        
+        file_name = ''.join(random.choices(string.ascii_letters + string.digits, k=16))
+        
+        # 获取七牛token
+        response = self.session.post(
+            self.QINIU_URL,
+            data={"fileName": f"{file_name}.jpeg"}
+        )
+        
+        token = response.json()["info"]["token"]
+        
+        # 上传图片
+        with self.byte_budget.reserve(os.path.getsize(image_path), job=image_path):
+            with open(image_path, "rb") as f:
+                chunk_data = f.read()
+            
+            self.upload_chunk(chunk_data, 0, token)
+            del chunk_data
+        self.complete_upload(1, token)
+        
+        # 获取上传后的URL
+        response = self.session.post(
+            self.COVER_URL,
+            data={"bizFlag": "web-douga-cover", "token": token}
+        )
+        
+        return response.json()["url"]
+
+    def _upload_budgeted_chunk(self, holder: list, fragment_id: int, upload_token: str, granted: int) -> bool:
+        """从 holder 中取出分块上传，上传结束、缓冲区不再被引用后归还预算"""
+        try:
+            return self.upload_chunk(holder.pop(), fragment_id, upload_token)
+        finally:
+            self.byte_budget.release(granted)
+
+    def upload_fragments(self, file_path: str, part_size: int, fragment_count: int,
+                         upload_token: str, prefix: str = "") -> bool:
+        """按顺序读取分块并发上传，同时在传的分块数不超过 fragment_workers"""
+        workers = max(1, self.fragment_workers)
+        file_size = os.path.getsize(file_path)
+        
+        if 0 < self.byte_budget.limit < part_size:
+            self.log(f"{prefix}分块大小 {part_size} 超过在途内存预算 {self.byte_budget.limit}，分块将逐个上传")
+        
+        with open(file_path, "rb") as f, ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            failed = None
+            
+            for fragment_id in range(fragment_count):
+                # 读取前先申请预算，分块上传结束后归还
+                granted = self.byte_budget.acquire(
+                    min(part_size, file_size - fragment_id * part_size), job=file_path
+                )
+                chunk_data = f.read(part_size)
+                if not chunk_data:
+                    self.byte_budget.release(granted)
+                    break
+                
+                # 缓冲区只放在 holder 中交给上传线程：submit 可能要等新线程启动，
+                # 返回前分块或许已上传完毕并归还预算，此时不能再由本线程引用
+                holder = [chunk_data]
+                del chunk_data
+                future = executor.submit(
+                    self._upload_budgeted_chunk, holder, fragment_id, upload_token, granted
+                )
+                pending[future] = fragment_id
+                
+                # 窗口已满时等待任一分块完成后再读取下一块
+                if len(pending) >= workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if not future.result():
+                            failed = pending[future]
+                        del pending[future]
+                    if failed is not None:
+                        break
+            
+            for future in as_completed(pending):
+                if not future.result() and failed is None:
+                    failed = pending[future]
+        
+        if failed is not None:
+            self.log(f"{prefix}分块 {failed + 1} 上传失败")
+            return False
+        return True
+
+    def upload_video(self, file_path: str, label: str = "") -> int:
+        """上传单个视频文件并创建视频，返回videoId"""
+        file_name = os.path.basename(file_path)
+        file_size = os.path.getsize(file_path)
+        prefix = f"[{label}] " if label else ""
+        
+        # 上传前校验容器结构，避免截断的文件白白传完
+        if self.check_media:
+            media_info = check_media(file_path)
+            if not media_info["ok"]:
+                self.log(f"{prefix}视频文件校验失败: {file_name} ({media_info['error']})")
+                return None
+            self.log(f"{prefix}视频文件校验通过: {file_name} ({describe(media_info)})")
+        
+        # 获取上传token
+        task_id, token, part_size = self.get_token(file_name, file_size)
+        fragment_count = ceil(file_size / part_size)
+        
+        self.log(f"{prefix}开始上传 {file_name}，共 {fragment_count} 个分块")
+        
+        # 上传视频文件
+        if not self.upload_fragments(file_path, part_size, fragment_count, token, prefix):
+            return None
+        
+        # 完成上传
+        self.complete_upload(fragment_count, token)
+        
+        # 创建视频
+        return self.create_video(task_id, file_name)
+
+    def submit_douga(self, video_infos: list, title: str, channel_id: int, cover_path: str,
+                     desc: str = "", tags: list = None, creation_type: int = 3,
+                     original_url: str = ""):
+        """提交投稿，video_infos 为按分P顺序排列的 {"videoId", "title"} 列表，成功时返回AC号"""
+        if tags is None:
+            tags = []
+        
+        # 上传封面
+        cover_url = self.upload_cover(cover_path)
+        
+        # 创建投稿
+        data = {
+            "title": title,
+            "description": desc,
+            "tagNames": json.dumps(tags),
+            "creationType": creation_type,
+            "channelId": channel_id,
+            "coverUrl": cover_url,
+            "videoInfos": json.dumps(video_infos),
+            "isJoinUpCollege": "0"
+        }
+        
+        if creation_type == 1:  # 转载
+            data["originalLinkUrl"] = original_url
+            data["originalDeclare"] = "0"
+        else:  # 原创
+            data["originalDeclare"] = "1"
+        
+        if self.before_submit is not None and not self.before_submit():
+            self.log("投稿前检查未通过，放弃投稿")
+            return False
+        
+        response = self.session.post(
+            self.C_DOUGA_URL,
+            data=data,
+            headers={
+                "origin": "https://member.acfun.cn",
+                "referer": "https://member.acfun.cn/upload-video"
+            }
+        )
+        
+        result = response.json()
+        if result["result"] == 0 and "dougaId" in result:
+            self.log(f"视频投稿成功！AC号：{result['dougaId']}")
+            if self.after_submit is not None:
+                try:
+                    self.after_submit(result["dougaId"], video_infos)
+                except Exception as e:
+                    self.log(f"记录投稿状态跟踪失败: {e}")
+            return result["dougaId"]
+        else:
+            self.log(f"视频投稿失败: {response.text}")
+            return False
+
+    def create_douga(self, file_path: str, title: str, channel_id: int, cover_path: str,
+                     desc: str = "", tags: list = None, creation_type: int = 3, 
+                     original_url: str = ""):
+        """创建投稿"""
+        self.upload_transport.ensure_pool_size(max(1, self.fragment_workers))
+        video_id = self.upload_video(file_path)
+        if not video_id:
+            return False
+        
+        return self.submit_douga(
+            [{"videoId": video_id, "title": title}],
+            title, channel_id, cover_path, desc, tags, creation_type, original_url
+        )
+
+    def create_multipart_douga(self, file_paths: list, title: str, channel_id: int, cover_path: str,
+                               desc: str = "", tags: list = None, creation_type: int = 3,
+                               original_url: str = "", part_titles: list = None,
+                               max_workers: int = None):
+        """创建多P投稿，各分P并发上传后按顺序一次性提交"""
+        if part_titles is None:
+            part_titles = []
+        if not max_workers:
+            max_workers = len(file_paths)
+        
+        titles = []
+        for index, file_path in enumerate(file_paths):
+            if index < len(part_titles) and part_titles[index]:
+                titles.append(part_titles[index])
+            else:
+                titles.append(Path(file_path).stem)
+        
+        # 任一分P损坏则整个投稿作废，先统一校验再开始传输
+        if self.check_media:
+            media_infos = check_media_many(file_paths, max_workers=max_workers)
+            broken = [path for path in file_paths if not media_infos[path]["ok"]]
+            for path in broken:
+                self.log(f"视频文件校验失败: {path} ({media_infos[path]['error']})")
+            if broken:
+                return False
+        
+        self.log(f"开始并发上传 {len(file_paths)} 个分P (并发数: {max_workers})")
+        
+        # 同时在传的请求数为 分P并发数 × 分块并发数，连接池需能全部容纳
+        self.upload_transport.ensure_pool_size(min(max_workers, len(file_paths)) * max(1, self.fragment_workers))
+        
+        # 每个分P独立走 get_token/fragment/complete/createVideo 流程
+        video_ids = [None] * len(file_paths)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.upload_video, file_path, f"P{index + 1}"): index
+                for index, file_path in enumerate(file_paths)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    video_ids[index] = future.result()
+                except Exception as e:
+                    self.log(f"[P{index + 1}] 上传出错: {e}")
+        
+        failed = [index + 1 for index, video_id in enumerate(video_ids) if not video_id]
+        if failed:
+            self.log(f"以下分P上传失败: {', '.join(f'P{n}' for n in failed)}")
+            return False
+        
+        video_infos = [
+            {"videoId": video_id, "title": part_title}
+            for video_id, part_title in zip(video_ids, titles)
+        ]
+        return self.submit_douga(
+            video_infos, title, channel_id, cover_path, desc, tags, creation_type, original_url
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="AcFun 命令行投稿工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63
+  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63 -u username -p password
+  python acfun_cli.py video.mp4 -c cover.png -t "视频标题" --cid 63 --tags "游戏" "实况"
+  python acfun_cli.py ep1.mp4 ep2.mp4 ep3.mp4 -c cover.png -t "合集标题" --cid 63 --part_titles "第一集" "第二集" "第三集"
+        """
+    )
+    
+    parser.add_argument("file_paths", nargs="+", metavar="file_path",
+                       help="视频文件路径 (指定多个文件时按顺序作为多P投稿)")
+    parser.add_argument("-c", "--cover", required=True, help="封面图片路径")
+    parser.add_argument("-t", "--title", required=True, help="稿件标题")
+    parser.add_argument("--cid", "--channel_id", type=int, required=True, help="频道ID")
+    parser.add_argument("-d", "--desc", default="", help="稿件简介")
+    parser.add_argument("--tags", nargs="*", default=[], help="稿件标签")
+    parser.add_argument("--type", type=int, choices=[1, 3], default=3, 
+                       help="创作类型 (1:转载, 3:原创)")
+    parser.add_argument("--original_url", default="", help="转载来源URL (仅转载时需要)")
+    parser.add_argument("-u", "--username", help="AcFun用户名")
+    parser.add_argument("-p", "--password", help="AcFun密码")
+    parser.add_argument("--cookie_file", default="cookies/ac_cookies.txt", 
+                       help="Cookie文件路径")
+    parser.add_argument("--cookie_ttl", type=float, default=600,
+                       help="Cookie验证结果的缓存时间(秒)，0表示每次都验证")
+    parser.add_argument("--part_titles", nargs="*", default=[],
+                       help="多P投稿的分P标题 (默认使用文件名)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="多P投稿并发上传的分P数 (默认全部并发)")
+    parser.add_argument("--transport", choices=TRANSPORT_MODES, default="http1",
+                       help="分块上传的传输方式 (http2/auto 需要 httpx[http2]，不可用时回退到 http1)")
+    parser.add_argument("--fragment_workers", type=int, default=1,
+                       help="单个视频并发上传的分块数")
+    parser.add_argument("--max_inflight_bytes", "--max-inflight-bytes", type=parse_size, default=0,
+                       help="进程内在途分块/封面缓冲区的内存上限，如 512M、2G (默认不限制)")
+    parser.add_argument("--job_db", help="多节点任务数据库路径 (由 batch_upload.py 传入)")
+    parser.add_argument("--job_id", type=int, help="任务数据库中的任务ID")
+    parser.add_argument("--node_id", help="当前节点ID，需与领取任务的节点一致")
+    parser.add_argument("--track_db", help="记录投稿以便 status_tracker.py 跟踪审核状态的数据库 (默认同 --job_db)")
+    parser.add_argument("--skip_check", action="store_true",
+                       help="跳过上传前的视频容器校验")
+    
+    args = parser.parse_args()
+    
+    # 检查文件是否存在
+    for file_path in args.file_paths:
+        if not os.path.exists(file_path):
+            print(f"错误: 视频文件不存在: {file_path}")
+            sys.exit(1)
+    
+    if not os.path.exists(args.cover):
+        print(f"错误: 封面文件不存在: {args.cover}")
+        sys.exit(1)
+    
+    # 创建上传器
+    uploader = AcFunUploader(transport=args.transport)
+    uploader.check_media = not args.skip_check
+    uploader.fragment_workers = args.fragment_workers
+    uploader.byte_budget.configure(args.max_inflight_bytes)
+    
+    # 多节点模式下投稿前确认仍持有任务租约，避免与接管的节点重复投稿
+    job_queue = None
+    if args.job_db and args.job_id is not None:
+        job_queue = JobQueue(args.job_db, node_id=args.node_id)
+        uploader.before_submit = lambda: job_queue.begin_submit(args.job_id)
+    
+    # 记录投稿，供 status_tracker.py 批量查询审核/发布状态
+    track_db = args.track_db or args.job_db
+    if track_db:
+        tracker = SubmissionTracker(track_db)
+        uploader.after_submit = lambda douga_id, video_infos: tracker.record(
+            douga_id, [info["videoId"] for info in video_infos], args.title, args.job_id
+        )
+    
+    uploader.cookie_ttl = args.cookie_ttl
+    
+    def get_credentials():
+        # 仅在cookie失效且没有其他进程刷新时才提示输入
+        username = args.username
+        password = args.password
+        
+        if not username:
+            username = input("请输入AcFun用户名: ")
+        
+        if not password:
+            password = getpass.getpass("请输入AcFun密码: ")
+        
+        return username, password
+    
+    # 优先使用cookie，失效时用户名密码登录
+    if not uploader.ensure_login(args.cookie_file, get_credentials):
+        print("登录失败，请检查用户名和密码")
+        sys.exit(1)
+    
+    # 测试网络连接
+    uploader.log("正在测试网络连接...")
+    if not uploader.test_network_connectivity():
+        print("\n网络连接测试失败！")
+        print("可能的解决方案:")
+        print("1. 检查网络连接是否正常")
+        print("2. 检查防火墙设置")
+        print("3. 尝试使用VPN或更换网络环境")
+        print("4. 检查DNS设置")
+        
+        choice = input("\n是否继续尝试上传? (y/N): ").lower().strip()
+        if choice not in ['y', 'yes']:
+            print("已取消上传")
+            sys.exit(1)
+    
+    # 执行上传
+    uploader.log("开始上传流程...")
+    if len(args.file_paths) > 1:
+        success = uploader.create_multipart_douga(
+            file_paths=args.file_paths,
+            title=args.title,
+            channel_id=args.cid,
+            cover_path=args.cover,
+            desc=args.desc,
+            tags=args.tags,
+            creation_type=args.type,
+            original_url=args.original_url,
+            part_titles=args.part_titles,
+            max_workers=args.workers
+        )
+    else:
+        success = uploader.create_douga(
+            file_path=args.file_paths[0],
+            title=args.title,
+            channel_id=args.cid,
+            cover_path=args.cover,
+            desc=args.desc,
+            tags=args.tags,
+            creation_type=args.type,
+            original_url=args.original_url
+        )
+    
+    if success:
+        if job_queue is not None:
+            job_queue.complete(args.job_id, success)
+        uploader.log("上传完成！")
+        print("\n🎉 视频上传成功！")
+    else:
+        uploader.log("上传失败")
+        print("\n❌ 上传失败，可能的原因:")
+        print("1. 网络连接不稳定")
+        print("2. 文件格式不支持")
+        print("3. 文件过大")
+        print("4. 服务器临时故障")
+        print("\n建议:")
+        print("- 检查网络连接")
+        print("- 稍后重试")
+        print("- 确认视频文件格式正确")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,171 +1,475 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-"""
-批量上传脚本示例
-演示如何批量上传多个视频到AcFun
-"""
-
-import os
-import subprocess
-import sys
-import time
-from pathlib import Path
-
-def find_video_files(directory="."):
-    """查找指定目录下的视频文件"""
-    video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv']
-    video_files = []
-    
-    for ext in video_extensions:
-        pattern = f"*{ext}"
-        video_files.extend(Path(directory).glob(pattern))
-    
-    return sorted(video_files)
-
-def find_cover_for_video(video_path):
-    """为视频文件查找对应的封面图片"""
-    video_stem = video_path.stem
-    video_dir = video_path.parent
-    
-    # 查找同名的图片文件
-    image_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.gif']
-    
-    for ext in image_extensions:
-        cover_path = video_dir / f"{video_stem}{ext}"
-        if cover_path.exists():
-            return cover_path
-    
-    # 如果没有同名图片，查找是否有默认封面
-    for ext in image_extensions:
-        cover_path = video_dir / f"cover{ext}"
-        if cover_path.exists():
-            return cover_path
-    
-    return None
-
-def upload_video(video_path, cover_path, channel_id=63, base_title="", tags=None):
-    """上传单个视频"""
-    if tags is None:
-        tags = ["批量上传", "自动化"]
-    
-    # 生成标题
-    video_name = video_path.stem
-    title = f"{base_title}{video_name}" if base_title else video_name
-    
-    # 构建上传命令
-    cmd = [
-        sys.executable, "acfun_cli.py",
-        str(video_path),
-        "-c", str(cover_path),
-        "-t", title,
-        "--cid", str(channel_id),
-        "-d", f"通过批量上传工具自动上传的视频: {video_name}",
-        "--tags"] + tags + [
-        "--type", "3"  # 原创
-    ]
-    
-    print(f"\n正在上传: {video_path.name}")
-    print(f"封面: {cover_path.name}")
-    print(f"标题: {title}")
-    print("-" * 50)
-    
-    try:
-        result = subprocess.run(cmd, capture_output=False, text=True)
-        
-        if result.returncode == 0:
-            print(f"✓ {video_path.name} 上传成功")
-            return True
-        else:
-            print(f"✗ {video_path.name} 上传失败")
-            return False
-            
-    except KeyboardInterrupt:
-        print(f"\n用户取消了 {video_path.name} 的上传")
-        raise
-    except Exception as e:
-        print(f"✗ {video_path.name} 上传出错: {e}")
-        return False
-
-def main():
-    print("AcFun 批量上传工具")
-    print("=" * 40)
-    
-    # 配置参数
-    directory = input("请输入视频文件目录 (默认当前目录): ").strip() or "."
-    channel_id = input("请输入频道ID (默认63-游戏区): ").strip() or "63"
-    base_title = input("请输入标题前缀 (可选): ").strip()
-    tags_input = input("请输入标签，用空格分隔 (默认: 批量上传 自动化): ").strip()
-    
-    # 处理标签
-    if tags_input:
-        tags = tags_input.split()
-    else:
-        tags = ["批量上传", "自动化"]
-    
-    # 查找视频文件
-    print(f"\n正在扫描目录: {directory}")
-    video_files = find_video_files(directory)
-    
-    if not video_files:
-        print("未找到视频文件！")
-        return
-    
-    print(f"找到 {len(video_files)} 个视频文件:")
-    
-    # 检查每个视频文件的封面
-    upload_list = []
-    for video_path in video_files:
-        cover_path = find_cover_for_video(video_path)
-        if cover_path:
-            print(f"  ✓ {video_path.name} -> {cover_path.name}")
-            upload_list.append((video_path, cover_path))
-        else:
-            print(f"  ✗ {video_path.name} (未找到封面)")
-    
-    if not upload_list:
-        print("\n没有可上传的视频文件（缺少封面）")
-        return
-    
-    print(f"\n准备上传 {len(upload_list)} 个视频")
-    print("配置信息:")
-    print(f"  频道ID: {channel_id}")
-    print(f"  标题前缀: {base_title or '(无)'}")
-    print(f"  标签: {', '.join(tags)}")
-    
-    # 确认上传
-    choice = input("\n是否开始批量上传? (y/N): ").lower().strip()
-    if choice not in ['y', 'yes']:
-        print("已取消批量上传")
-        return
-    
-    # 开始批量上传
-    success_count = 0
-    total_count = len(upload_list)
-    
-    print(f"\n开始批量上传 ({total_count} 个文件)")
-    print("=" * 50)
-    
-    try:
-        for i, (video_path, cover_path) in enumerate(upload_list, 1):
-            print(f"\n[{i}/{total_count}]", end=" ")
-            
-            if upload_video(video_path, cover_path, int(channel_id), base_title, tags):
-                success_count += 1
-            
-            # 上传间隔，避免请求过快
-            if i < total_count:
-                print("等待5秒后继续...")
-                time.sleep(5)
-                
-    except KeyboardInterrupt:
-        print("\n\n用户取消了批量上传")
-    
-    # 上传结果总结
-    print("\n" + "=" * 50)
-    print("批量上传完成")
-    print(f"成功: {success_count}/{total_count}")
-    print(f"失败: {total_count - success_count}/{total_count}")
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量上传脚本示例
+演示如何批量上传多个视频到AcFun
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+from job_queue import CLAIMED, DONE, FAILED, PENDING, JobQueue, LeaseKeeper
+from manifest import iter_jobs
+from media_check import check_media_many, describe
+from memory_budget import parse_size
+from upload_transport import TRANSPORT_MODES
+from scheduler import POLICIES, Scheduler, ThroughputEstimator, compare_policies, format_duration
+
+def find_video_files(directory="."):
+    """查找指定目录下的视频文件"""
+    video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv']
+    video_files = []
+    
+    for ext in video_extensions:
+        pattern = f"*{ext}"
+        video_files.extend(Path(directory).glob(pattern))
+    
+    return sorted(video_files)
+
+def find_cover_for_video(video_path):
+    """为视频文件查找对应的封面图片"""
+    video_stem = video_path.stem
+    video_dir = video_path.parent
+    
+    # 查找同名的图片文件
+    image_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.gif']
+    
+    for ext in image_extensions:
+        cover_path = video_dir / f"{video_stem}{ext}"
+        if cover_path.exists():
+            return cover_path
+    
+    # 如果没有同名图片，查找是否有默认封面
+    for ext in image_extensions:
+        cover_path = video_dir / f"cover{ext}"
+        if cover_path.exists():
+            return cover_path
+    
+    return None
+
+def upload_video(video_path, cover_path, channel_id=63, base_title="", tags=None, extra_args=None,
+                 title=None, desc=None, creation_type=3, original_url=""):
+    """上传单个视频"""
+    if tags is None:
+        tags = ["批量上传", "自动化"]
+    
+    # 生成标题
+    video_name = video_path.stem
+    if not title:
+        title = f"{base_title}{video_name}" if base_title else video_name
+    if desc is None:
+        desc = f"通过批量上传工具自动上传的视频: {video_name}"
+    
+    # 构建上传命令
+    cmd = [
+        sys.executable, "acfun_cli.py",
+        str(video_path),
+        "-c", str(cover_path),
+        "-t", title,
+        "--cid", str(channel_id),
+        "-d", desc,
+        "--tags"] + tags + [
+        "--type", str(creation_type)
+    ]
+    if creation_type == 1:
+        cmd += ["--original_url", original_url]
+    if extra_args:
+        cmd += extra_args
+    
+    print(f"\n正在上传: {video_path.name}")
+    print(f"封面: {cover_path.name}")
+    print(f"标题: {title}")
+    print("-" * 50)
+    
+    try:
+        result = subprocess.run(cmd, capture_output=False, text=True)
+        
+        if result.returncode == 0:
+            print(f"✓ {video_path.name} 上传成功")
+            return True
+        else:
+            print(f"✗ {video_path.name} 上传失败")
+            return False
+            
+    except KeyboardInterrupt:
+        print(f"\n用户取消了 {video_path.name} 的上传")
+        raise
+    except Exception as e:
+        print(f"✗ {video_path.name} 上传出错: {e}")
+        return False
+
+def upload_job(job, extra_args=None):
+    """按任务中的稿件信息上传"""
+    return upload_video(
+        job["video"], job["cover"], job["channel_id"], tags=job["tags"], extra_args=extra_args,
+        title=job["title"], desc=job["desc"], creation_type=job["type"],
+        original_url=job["original_url"]
+    )
+
+def make_directory_job(directory, video_path, cover_path, channel_id, base_title, tags):
+    """目录扫描模式下由文件名生成任务"""
+    video_name = video_path.stem
+    return {
+        "key": video_path.relative_to(directory).as_posix(),
+        "cover_key": cover_path.relative_to(directory).as_posix(),
+        "video": video_path,
+        "cover": cover_path,
+        "size": video_path.stat().st_size,
+        "title": f"{base_title}{video_name}" if base_title else video_name,
+        "channel_id": channel_id,
+        "desc": f"通过批量上传工具自动上传的视频: {video_name}",
+        "tags": tags,
+        "type": 3,  # 原创
+        "original_url": "",
+        "priority": 0,
+        "deadline": None
+    }
+
+def build_cli_args(args, workers=1):
+    """传给每个 acfun_cli.py 进程的调优参数，在途内存上限按同时运行的进程数平分"""
+    cli_args = ["--transport", args.transport, "--fragment_workers", str(args.fragment_workers)]
+    if args.max_inflight_bytes:
+        cli_args += ["--max_inflight_bytes", str(max(1, args.max_inflight_bytes // max(1, workers)))]
+    return cli_args
+
+def print_policy_report(jobs, estimator, workers=1):
+    """按当前吞吐量估算各调度策略下的发布时间"""
+    throughput = estimator.throughput / 1024 / 1024
+    print(f"\n调度策略对比 (估算吞吐量 {throughput:.2f} MB/s，并发 {workers}):")
+    print(f"  {'策略':<10}{'平均发布时间':>12}{'全部完成':>12}{'超时任务':>10}")
+    for policy, stats in compare_policies(jobs, estimator, workers).items():
+        print(f"  {policy:<10}{format_duration(stats['mean']):>12}"
+              f"{format_duration(stats['max']):>12}{stats['missed']:>10}")
+
+def run_local(jobs, policy="fifo", workers=1, estimator=None, throughput_file=None, track_db=None,
+              window=1000, cli_args=None):
+    """单机模式：按调度策略依次分发任务给 workers 个并发上传
+
+    jobs 可以是列表或生成器；生成器由后台线程边读边推入调度队列，
+    队列中最多保留 window 个任务，调度策略只在这些任务之间排序。
+    cli_args 会附加到每个 acfun_cli.py 进程的命令行
+    """
+    if estimator is None:
+        estimator = ThroughputEstimator()
+    
+    scheduler = Scheduler(policy)
+    total_count = len(jobs) if isinstance(jobs, list) else None
+    produced = [0]
+    publish_times = []
+    started = [0]
+    lock = threading.Lock()
+    start_time = time.time()
+    
+    def producer():
+        try:
+            for job in jobs:
+                scheduler.wait_below(window)
+                if scheduler.closed:
+                    return
+                scheduler.push(job)
+                produced[0] += 1
+        except Exception as e:
+            print(f"\n读取任务出错: {e}")
+        finally:
+            scheduler.finish()
+    
+    count_text = f"{total_count} 个文件" if total_count is not None else "流式读取清单"
+    print(f"\n开始批量上传 ({count_text}，调度策略: {policy}，并发: {workers})")
+    print("=" * 50)
+    
+    def worker():
+        while True:
+            job = scheduler.pop(block=True)
+            if job is None:
+                return
+            
+            with lock:
+                started[0] += 1
+                progress = f"{started[0]}/{total_count}" if total_count is not None else str(started[0])
+                print(f"\n[{progress}]", end=" ")
+            
+            job_start = time.time()
+            extra_args = list(cli_args or [])
+            if track_db:
+                extra_args += ["--track_db", track_db]
+            if upload_job(job, extra_args):
+                estimator.observe(job["size"], time.time() - job_start)
+                with lock:
+                    publish_times.append(time.time() - start_time)
+            
+            # 上传间隔，避免请求过快
+            if len(scheduler) or not scheduler.finished:
+                print("等待5秒后继续...")
+                time.sleep(5)
+    
+    threads = [threading.Thread(target=producer, daemon=True)]
+    threads += [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\n\n用户取消了批量上传")
+        scheduler.close()
+    
+    if throughput_file and estimator.samples:
+        estimator.save(throughput_file)
+    
+    # 上传结果总结
+    total_count = produced[0]
+    success_count = len(publish_times)
+    print("\n" + "=" * 50)
+    print("批量上传完成")
+    print(f"成功: {success_count}/{total_count}")
+    print(f"失败: {total_count - success_count}/{total_count}")
+    if publish_times:
+        print(f"平均发布时间: {format_duration(sum(publish_times) / len(publish_times))} (策略: {policy})")
+
+def _job_from_params(directory, params):
+    """由任务数据库中的参数还原任务，路径按本节点的目录解析"""
+    video_path = directory / params["file"]
+    base_title = params.get("base_title", "")
+    return {
+        "video": video_path,
+        "cover": directory / params["cover"],
+        "title": params.get("title") or f"{base_title}{video_path.stem}",
+        "channel_id": params["channel_id"],
+        "desc": params.get("desc"),
+        "tags": params["tags"],
+        "type": params.get("type", 3),
+        "original_url": params.get("original_url", "")
+    }
+
+def run_cluster(job_db, directory, jobs, node_id=None, lease=300, policy="fifo", estimator=None,
+                throughput_file=None, chunk_size=200, cli_args=None, track_db=None):
+    """多节点模式：任务写入共享数据库，各节点领取任务并在上传期间续约
+
+    jobs 由后台线程按块写入数据库，写入的同时即可开始领取任务；
+    cli_args 会附加到每个 acfun_cli.py 进程的命令行，
+    track_db 未指定时投稿记录在 job_db 中
+    """
+    queue = JobQueue(job_db, node_id=node_id, lease_seconds=lease)
+    added = [0]
+    
+    def producer():
+        # 以相对路径作为任务标识，各节点的挂载点可以不同
+        job_iter = iter(jobs)
+        try:
+            while True:
+                chunk = list(islice(job_iter, chunk_size))
+                if not chunk:
+                    return
+                added[0] += queue.add_many([
+                    (job["key"], {
+                        "file": job["key"],
+                        "cover": job["cover_key"],
+                        "title": job["title"],
+                        "channel_id": job["channel_id"],
+                        "desc": job["desc"],
+                        "tags": job["tags"],
+                        "type": job["type"],
+                        "original_url": job["original_url"]
+                    }, job["size"], job["priority"], job["deadline"])
+                    for job in chunk
+                ])
+        except Exception as e:
+            print(f"\n写入任务出错: {e}")
+    
+    ingest = threading.Thread(target=producer, daemon=True)
+    ingest.start()
+    
+    print(f"\n节点ID: {queue.node_id}")
+    print("已存在的任务不会重复添加")
+    print("=" * 50)
+    
+    success_count = 0
+    failed_count = 0
+    job = None
+    waiting = False
+    
+    try:
+        while True:
+            job = queue.claim(policy)
+            if job is None:
+                # 清单仍在写入时等待新任务
+                if ingest.is_alive():
+                    ingest.join(1)
+                    continue
+                job = queue.claim(policy)
+                if job is None:
+                    # 其他节点仍持有租约时继续等待，节点崩溃后其任务在租约过期时由本节点接管
+                    expires = queue.next_lease_expiry()
+                    if expires is None:
+                        break
+                    if not waiting:
+                        print(f"\n等待其他节点的 {queue.counts().get(CLAIMED, 0)} 个任务完成或租约过期...")
+                        waiting = True
+                    time.sleep(min(max(expires - time.time(), 1), 10))
+                    continue
+            waiting = False
+            
+            params = job["params"]
+            print(f"\n[任务 {job['id']} 第{job['attempts']}次]", end=" ")
+            
+            # 投稿前由 acfun_cli.py 检查租约，租约丢失时不会提交
+            extra_args = list(cli_args or []) + [
+                "--job_db", job_db, "--job_id", str(job["id"]), "--node_id", queue.node_id
+            ]
+            if track_db:
+                extra_args += ["--track_db", track_db]
+            job_start = time.time()
+            with LeaseKeeper(queue, job["id"]) as keeper:
+                ok = upload_job(_job_from_params(directory, params), extra_args)
+            
+            if ok:
+                if estimator is not None:
+                    estimator.observe(job["size"], time.time() - job_start)
+                queue.complete(job["id"])
+                success_count += 1
+            else:
+                queue.fail(job["id"], "任务租约丢失" if keeper.lost else "上传失败")
+                failed_count += 1
+            
+            # 上传间隔，避免请求过快
+            print("等待5秒后继续...")
+            time.sleep(5)
+    
+    except KeyboardInterrupt:
+        print("\n\n用户取消了批量上传")
+        if job is not None:
+            queue.fail(job["id"], "用户取消")
+    
+    if throughput_file and estimator is not None and estimator.samples:
+        estimator.save(throughput_file)
+    
+    counts = queue.counts()
+    print("\n" + "=" * 50)
+    print("本节点上传完成")
+    print(f"本节点新增任务: {added[0]}")
+    print(f"成功: {success_count}  失败: {failed_count}")
+    print(f"全部任务 - 已完成: {counts.get(DONE, 0)}  等待中: {counts.get(PENDING, 0)}  "
+          f"失败: {counts.get(FAILED, 0)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="AcFun 批量上传工具")
+    parser.add_argument("--manifest", help="JSONL/CSV 任务清单，指定后不再扫描目录和交互输入")
+    parser.add_argument("--job_db", help="多节点共享的任务数据库路径 (放在共享存储上)")
+    parser.add_argument("--node_id", help="节点ID (默认: 主机名-进程号-随机后缀)")
+    parser.add_argument("--lease", type=float, default=300, help="任务租约时长(秒)")
+    parser.add_argument("--schedule", choices=POLICIES, default="fifo",
+                        help="调度策略: fifo 文件名顺序, sjf 小文件优先, largest 大文件优先, deadline 按优先级/截止时间")
+    parser.add_argument("--workers", type=int, default=1, help="单机模式下同时上传的视频数")
+    parser.add_argument("--track_db", help="记录投稿供 status_tracker.py 跟踪的数据库 (多节点模式下默认使用 --job_db)")
+    parser.add_argument("--throughput_file", default="cookies/throughput.json",
+                        help="保存实测吞吐量的文件，用于估算任务耗时")
+    parser.add_argument("--transport", choices=TRANSPORT_MODES, default="http1",
+                        help="各上传进程分块上传的传输方式 (http2/auto 需要 httpx[http2]，不可用时回退到 http1)")
+    parser.add_argument("--fragment_workers", type=int, default=1, help="每个视频并发上传的分块数")
+    parser.add_argument("--max_inflight_bytes", "--max-inflight-bytes", type=parse_size, default=0,
+                        help="所有并发上传进程合计的在途内存上限，如 512M、2G，按 --workers 平分给各进程 (默认不限制)")
+    args = parser.parse_args()
+    
+    print("AcFun 批量上传工具")
+    print("=" * 40)
+    
+    estimator = ThroughputEstimator()
+    estimator.load(args.throughput_file)
+    
+    # 清单模式：逐块读取校验，读到的任务立即交给上传线程
+    if args.manifest:
+        print(f"读取任务清单: {args.manifest}")
+        jobs = iter_jobs(args.manifest)
+        if args.job_db:
+            run_cluster(args.job_db, Path(args.manifest).parent, jobs, args.node_id, args.lease,
+                        args.schedule, estimator, args.throughput_file, cli_args=build_cli_args(args),
+                        track_db=args.track_db)
+        else:
+            run_local(jobs, args.schedule, args.workers, estimator, args.throughput_file, args.track_db,
+                      cli_args=build_cli_args(args, args.workers))
+        return
+    
+    # 配置参数
+    directory = input("请输入视频文件目录 (默认当前目录): ").strip() or "."
+    channel_id = input("请输入频道ID (默认63-游戏区): ").strip() or "63"
+    base_title = input("请输入标题前缀 (可选): ").strip()
+    tags_input = input("请输入标签，用空格分隔 (默认: 批量上传 自动化): ").strip()
+    
+    # 处理标签
+    if tags_input:
+        tags = tags_input.split()
+    else:
+        tags = ["批量上传", "自动化"]
+    
+    # 查找视频文件
+    print(f"\n正在扫描目录: {directory}")
+    video_files = find_video_files(directory)
+    
+    if not video_files:
+        print("未找到视频文件！")
+        return
+    
+    print(f"找到 {len(video_files)} 个视频文件:")
+    
+    # 并发校验视频容器结构，提前剔除截断或仍在写入的文件
+    media_infos = check_media_many(video_files)
+    
+    # 检查每个视频文件的封面
+    upload_list = []
+    for video_path in video_files:
+        media_info = media_infos[video_path]
+        if not media_info["ok"]:
+            print(f"  ✗ {video_path.name} (文件损坏: {media_info['error']})")
+            continue
+        
+        cover_path = find_cover_for_video(video_path)
+        if cover_path:
+            print(f"  ✓ {video_path.name} -> {cover_path.name} ({describe(media_info)})")
+            upload_list.append((video_path, cover_path))
+        else:
+            print(f"  ✗ {video_path.name} (未找到封面)")
+    
+    if not upload_list:
+        print("\n没有可上传的视频文件（缺少封面）")
+        return
+    
+    print(f"\n准备上传 {len(upload_list)} 个视频")
+    print("配置信息:")
+    print(f"  频道ID: {channel_id}")
+    print(f"  标题前缀: {base_title or '(无)'}")
+    print(f"  标签: {', '.join(tags)}")
+    print(f"  调度策略: {args.schedule}")
+    
+    # 按字节数和历史吞吐量估算各策略的发布时间
+    jobs = [
+        make_directory_job(Path(directory), video_path, cover_path, int(channel_id), base_title, tags)
+        for video_path, cover_path in upload_list
+    ]
+    print_policy_report(jobs, estimator, args.workers)
+    
+    # 确认上传
+    choice = input("\n是否开始批量上传? (y/N): ").lower().strip()
+    if choice not in ['y', 'yes']:
+        print("已取消批量上传")
+        return
+    
+    if args.job_db:
+        run_cluster(args.job_db, Path(directory), jobs, args.node_id, args.lease, args.schedule,
+                    estimator, args.throughput_file, cli_args=build_cli_args(args), track_db=args.track_db)
+        return
+    
+    # 开始批量上传
+    run_local(jobs, args.schedule, args.workers, estimator, args.throughput_file, args.track_db,
+              cli_args=build_cli_args(args, args.workers))
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分块上传传输层基准测试
+在本地启动模拟分块接口的 HTTP/1.1 和 HTTP/2 (h2c) 测试服务器，
+对比两种传输方式在不同并发数下的耗时、吞吐量和服务端连接数
+需要安装 httpx[http2]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from upload_transport import UploadTransport, http2_available
+
+RESPONSE_BODY = json.dumps({"result": 1}).encode()
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+def start_http1_server(latency: float, counter: ConnectionCounter) -> int:
+    """启动 HTTP/1.1 测试服务器，返回端口"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            counter.add()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+            self.end_headers()
+            self.wfile.write(RESPONSE_BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def start_http2_server(latency: float, counter: ConnectionCounter) -> int:
+    """启动明文 HTTP/2 (h2c) 测试服务器，返回端口"""
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+
+    class H2Protocol(asyncio.Protocol):
+        def connection_made(self, transport):
+            counter.add()
+            self.transport = transport
+            self.conn = h2.connection.H2Connection(
+                config=h2.config.H2Configuration(client_side=False)
+            )
+            self.conn.initiate_connection()
+            self.conn.update_settings({h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: 2 ** 30})
+            self.conn.increment_flow_control_window(2 ** 30)
+            self.transport.write(self.conn.data_to_send())
+
+        def data_received(self, data):
+            try:
+                events = self.conn.receive_data(data)
+            except h2.exceptions.ProtocolError:
+                self.transport.write(self.conn.data_to_send())
+                self.transport.close()
+                return
+
+            for event in events:
+                if isinstance(event, h2.events.DataReceived):
+                    self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    loop.call_later(latency, self.respond, event.stream_id)
+            self.transport.write(self.conn.data_to_send())
+
+        def respond(self, stream_id):
+            try:
+                self.conn.send_headers(stream_id, [
+                    (":status", "200"),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(RESPONSE_BODY)))
+                ])
+                self.conn.send_data(stream_id, RESPONSE_BODY, end_stream=True)
+            except h2.exceptions.StreamClosedError:
+                return
+            self.transport.write(self.conn.data_to_send())
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(loop.create_server(H2Protocol, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def run_round(transport: UploadTransport, url: str, block: bytes, requests_count: int,
+              concurrency: int) -> float:
+    """以指定并发数发送分块请求，返回耗时"""
+
+    def post(fragment_id):
+        response = transport.post(
+            url,
+            params={"fragment_id": fragment_id, "upload_token": "bench"},
+            data=block,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=(30, 120)
+        )
+        return response.status_code == 200 and response.json().get("result") == 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(post, range(requests_count)))
+    elapsed = time.perf_counter() - start
+
+    if not all(results):
+        raise RuntimeError("测试服务器返回了失败的响应")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 HTTP/1.1 与 HTTP/2 分块上传传输层")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32],
+                        help="并发数列表")
+    parser.add_argument("--requests", type=int, default=64, help="每轮发送的分块数")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="分块大小(字节)")
+    parser.add_argument("--latency", type=float, default=0.05, help="服务端模拟处理延迟(秒)")
+    args = parser.parse_args()
+
+    if not http2_available():
+        print("错误: 基准测试需要安装 httpx[http2]")
+        return
+
+    block = b"\0" * args.size
+    modes = []
+
+    counter1 = ConnectionCounter()
+    port1 = start_http1_server(args.latency, counter1)
+    modes.append(("http1", f"http://127.0.0.1:{port1}/api/upload/fragment", counter1))
+
+    counter2 = ConnectionCounter()
+    port2 = start_http2_server(args.latency, counter2)
+    modes.append(("http2", f"http://127.0.0.1:{port2}/api/upload/fragment", counter2))
+
+    print(f"分块数: {args.requests}  分块大小: {args.size} 字节  模拟延迟: {args.latency}秒")
+    print(f"{'传输方式':<10}{'并发数':>8}{'耗时(秒)':>12}{'吞吐(MB/s)':>14}{'连接数':>10}")
+    print("-" * 54)
+
+    for concurrency in args.concurrency:
+        for mode, url, counter in modes:
+            transport = UploadTransport(mode, pool_size=concurrency, prior_knowledge=True)
+            counter.reset()
+            try:
+                elapsed = run_round(transport, url, block, args.requests, concurrency)
+            finally:
+                transport.close()
+            throughput = args.requests * args.size / elapsed / 1024 / 1024
+            print(f"{transport.http_version:<10}{concurrency:>8}{elapsed:>12.3f}{throughput:>14.1f}{counter.count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程共享的 Cookie 存储
+写入时加文件锁并原子替换，记录最近一次验证通过的时间，
+配合 AcFunUploader.ensure_login 实现同一账号只由一个进程重新登录
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from hashlib import sha1
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class _FileLock:
+    """跨进程文件锁，同一进程内可重入"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.path, "a+b")
+                self._lock(self._file)
+            except Exception:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                self._unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _lock(f):
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            return
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+
+    @staticmethod
+    def _unlock(f):
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _get_lock(path: str) -> _FileLock:
+    """同一路径在进程内共享一把锁"""
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = _FileLock(path)
+        return _locks[path]
+
+
+def _atomic_write(path: str, content: str):
+    """写入同目录临时文件后原子替换，读取方不会看到写了一半的文件"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CredentialStore:
+    """Cookie 文件及其验证状态
+
+    - cookie 文件本身保持原有格式 (Netscape 或 JSON)
+    - <cookie_file>.lock 用于写入和重新登录时的互斥
+    - <cookie_file>.meta 记录最近一次验证通过或密码登录失败的时间和对应内容的指纹
+    """
+
+    def __init__(self, cookie_file: str, ttl: float = 600, failure_ttl: float = 300):
+        self.cookie_file = os.path.abspath(cookie_file)
+        self.meta_file = self.cookie_file + ".meta"
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._lock = _get_lock(self.cookie_file + ".lock")
+
+    @contextmanager
+    def lock(self):
+        """持有独占锁期间其他进程的写入和重新登录都会等待"""
+        self._ensure_dir()
+        self._lock.acquire()
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _ensure_dir(self):
+        os.makedirs(os.path.dirname(self.cookie_file), exist_ok=True)
+
+    def read(self) -> str:
+        """读取 cookie 文件内容，不存在时返回 None"""
+        try:
+            with open(self.cookie_file, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def fingerprint(self, content: str = None) -> str:
+        """cookie 内容的指纹，用于判断文件是否已被其他进程刷新"""
+        if content is None:
+            content = self.read()
+        if content is None:
+            return None
+        return sha1(content.encode("utf-8")).hexdigest()
+
+    def write(self, cookies_data: list):
+        """加锁写入 cookie 并标记为有效"""
+        content = json.dumps(cookies_data, ensure_ascii=False, indent=2)
+        with self.lock():
+            _atomic_write(self.cookie_file, content)
+            self.mark_valid(content)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def mark_valid(self, content: str = None):
+        """记录当前内容在此刻验证通过"""
+        self._ensure_dir()
+        meta = {
+            "fingerprint": self.fingerprint(content),
+            "validated_at": time.time()
+        }
+        _atomic_write(self.meta_file, json.dumps(meta))
+
+    def mark_failed(self, fingerprint: str):
+        """记录基于该 cookie 内容的密码登录刚刚失败，需在持有锁时调用"""
+        self._ensure_dir()
+        meta = {
+            "fingerprint": fingerprint,
+            "failed_at": time.time()
+        }
+        _atomic_write(self.meta_file, json.dumps(meta))
+
+    def recently_failed(self, fingerprint: str) -> bool:
+        """该 cookie 内容失效后其他进程在 failure_ttl 内已尝试过密码登录且失败"""
+        meta = self._read_meta()
+        if "failed_at" not in meta or meta.get("fingerprint") != fingerprint:
+            return False
+        return time.time() - meta["failed_at"] < self.failure_ttl
+
+    def is_fresh(self, content: str) -> bool:
+        """内容在 ttl 内验证通过过，可以跳过 test_login"""
+        if self.ttl <= 0:
+            return False
+        meta = self._read_meta()
+        if meta.get("fingerprint") != self.fingerprint(content) or "validated_at" not in meta:
+            return False
+        return time.time() - meta["validated_at"] < self.ttl
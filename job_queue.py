@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多节点共享的上传任务队列
+任务保存在共享目录下的 SQLite 数据库中，节点通过事务原子领取任务并持有租约，
+上传期间定期续约，租约过期的任务可被其他节点接管。
+任务进入 submitting 状态后不会再被自动重试，避免重复投稿
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from scheduler import SQL_ORDER
+
+# 任务状态
+PENDING = "pending"          # 等待领取
+CLAIMED = "claimed"          # 已被节点领取，正在上传
+SUBMITTING = "submitting"    # 正在调用 createDouga，结果未确认前不可重试
+DONE = "done"                # 投稿成功
+FAILED = "failed"            # 失败且不再自动重试
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    params TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    deadline REAL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    douga_id TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+"""
+
+
+@contextmanager
+def connect(db_path: str):
+    """打开任务数据库的短连接，事务由调用方显式控制"""
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def default_node_id() -> str:
+    """主机名 + 进程号 + 随机后缀，保证同一主机上多个进程也不冲突"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    """共享 SQLite 任务队列
+
+    数据库需放在所有节点都能访问且支持文件锁的共享目录上；
+    每次操作使用独立的短连接，可在多个线程中同时使用
+    """
+
+    def __init__(self, db_path: str, node_id: str = None, lease_seconds: float = 300,
+                 max_attempts: int = 3):
+        self.db_path = db_path
+        self.node_id = node_id or default_node_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE 立即获取写锁，保证领取等读改写操作的原子性"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _to_job(row) -> dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def add(self, job_key: str, params: dict, size: int = 0, priority: int = 0,
+            deadline: float = None) -> bool:
+        """添加任务，job_key 已存在时忽略，返回是否新增
+
+        size/priority/deadline (时间戳) 供 claim 的调度策略排序
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, params, size, priority, deadline, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_key, json.dumps(params, ensure_ascii=False), size, priority, deadline, now, now)
+            )
+            return cursor.rowcount == 1
+
+    def add_many(self, jobs: list) -> int:
+        """在一个事务中批量添加 (job_key, params, size, priority, deadline)，返回新增数量"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (job_key, params, size, priority, deadline, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (job_key, json.dumps(params, ensure_ascii=False), size, priority, deadline, now, now)
+                    for job_key, params, size, priority, deadline in jobs
+                ]
+            )
+            return conn.total_changes - before
+
+    def claim(self, policy: str = "fifo") -> dict:
+        """按调度策略领取一个待处理或租约已过期的任务，没有可领取的任务时返回 None
+
+        租约过期且已达到重试次数的任务 (如反复导致节点崩溃的文件) 标记为 failed，不再接管
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "租约过期次数达到上限", now, CLAIMED, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                f"ORDER BY {SQL_ORDER[policy]} LIMIT 1",
+                (PENDING, CLAIMED, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (CLAIMED, self.node_id, now + self.lease_seconds, now, row["id"])
+            )
+            job = self._to_job(row)
+            job.update(status=CLAIMED, owner=self.node_id, attempts=row["attempts"] + 1)
+            return job
+
+    def renew(self, job_id: int) -> bool:
+        """续约，返回 False 表示租约已丢失 (已被其他节点接管)"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status IN (?, ?) AND lease_expires >= ?",
+                (now + self.lease_seconds, now, job_id, self.node_id, CLAIMED, SUBMITTING, now)
+            )
+            return cursor.rowcount == 1
+
+    def begin_submit(self, job_id: int) -> bool:
+        """投稿前的栅栏：仍持有有效租约时进入 submitting 状态并返回 True
+
+        此后即使租约过期也不会被其他节点接管
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = ? AND lease_expires >= ?",
+                (SUBMITTING, now, job_id, self.node_id, CLAIMED, now)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, douga_id=None) -> bool:
+        """记录投稿成功"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, douga_id = COALESCE(?, douga_id), lease_expires = NULL, "
+                "error = NULL, updated_at = ? WHERE id = ? AND owner = ? AND status IN (?, ?)",
+                (DONE, None if douga_id is None else str(douga_id), time.time(),
+                 job_id, self.node_id, CLAIMED, SUBMITTING)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, error: str = ""):
+        """记录失败
+
+        上传阶段失败且未超过重试次数时放回队列；已进入 submitting 的任务投稿结果未知，
+        标记为 failed 等待人工确认
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, attempts FROM jobs WHERE id = ? AND owner = ?",
+                (job_id, self.node_id)
+            ).fetchone()
+            if row is None or row["status"] not in (CLAIMED, SUBMITTING):
+                return
+
+            if row["status"] == CLAIMED and row["attempts"] < self.max_attempts:
+                status = PENDING
+            else:
+                status = FAILED
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (status, error, now, job_id)
+            )
+
+    def next_lease_expiry(self) -> float:
+        """claimed 状态任务中最早的租约过期时间，没有此类任务时返回 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(lease_expires) AS t FROM jobs WHERE status = ?", (CLAIMED,)
+            ).fetchone()
+            return row["t"]
+
+    def get(self, job_id: int) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._to_job(row) if row else None
+
+    def counts(self) -> dict:
+        """各状态的任务数"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["n"] for row in rows}
+
+
+class LeaseKeeper:
+    """后台线程定期续约，租约丢失时设置 lost 标记"""
+
+    def __init__(self, queue: JobQueue, job_id: int, interval: float = None):
+        self.queue = queue
+        self.job_id = job_id
+        self.interval = interval or queue.lease_seconds / 3
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.renew(self.job_id):
+                    self.lost = True
+                    return
+            except sqlite3.Error:
+                # 共享存储短暂不可用时下次再试，租约仍有余量
+                continue
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量上传清单 (JSONL / CSV)
+逐行惰性读取，按块校验后产出任务，超大清单也能立即开始上传且内存占用恒定。
+
+每行字段：
+  file          视频文件路径 (必需，相对路径以清单所在目录为基准)
+  cover         封面图片路径 (必需)
+  title         稿件标题 (默认使用文件名)
+  cid           频道ID (默认63)
+  desc          稿件简介
+  tags          标签，JSON 中为列表，CSV 中以空格分隔
+  type          创作类型 (1:转载, 3:原创，默认3)
+  original_url  转载来源URL (type 为1时必需)
+  priority      调度优先级 (可选，越大越先上传)
+  deadline      截止时间 (可选，时间戳或 ISO 格式时间)
+"""
+
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from media_check import check_media_many
+
+
+class ManifestError(Exception):
+    """清单行内容无效"""
+
+
+def read_rows(manifest_path):
+    """逐行读取清单，产出 (行号, 原始字段)；扩展名为 .csv 时按 CSV 解析，否则按 JSONL"""
+    manifest_path = Path(manifest_path)
+    with open(manifest_path, "r", encoding="utf-8-sig", newline="") as f:
+        if manifest_path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, ManifestError(f"JSON 解析失败: {e}")
+                continue
+            yield line_no, row
+
+
+def _parse_deadline(value):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ManifestError(f"无效的截止时间: {value}")
+
+
+def _parse_int(row: dict, field: str, default: int) -> int:
+    value = row.get(field)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ManifestError(f"{field} 不是整数: {value}")
+
+
+def _parse_str(row: dict, field: str, strip: bool = True) -> str:
+    """文本字段，数字按字符串处理，其他类型视为无效"""
+    value = row.get(field)
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        raise ManifestError(f"{field} 必须是字符串: {value!r}")
+    return value.strip() if strip else value
+
+
+def parse_row(row, base_dir: Path) -> dict:
+    """校验单行字段和文件是否存在，转换为任务"""
+    if isinstance(row, ManifestError):
+        raise row
+    if not isinstance(row, dict):
+        raise ManifestError("每行必须是一个对象")
+
+    file_value = _parse_str(row, "file")
+    cover_value = _parse_str(row, "cover")
+    if not file_value:
+        raise ManifestError("缺少 file")
+    if not cover_value:
+        raise ManifestError("缺少 cover")
+
+    video_path = base_dir / file_value
+    cover_path = base_dir / cover_value
+    if not video_path.is_file():
+        raise ManifestError(f"视频文件不存在: {video_path}")
+    if not cover_path.is_file():
+        raise ManifestError(f"封面文件不存在: {cover_path}")
+
+    tags = row.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split()
+    if not isinstance(tags, list):
+        raise ManifestError("tags 必须是列表或空格分隔的字符串")
+
+    creation_type = _parse_int(row, "type", 3)
+    if creation_type not in (1, 3):
+        raise ManifestError(f"type 只能为 1 或 3: {creation_type}")
+    original_url = _parse_str(row, "original_url")
+    if creation_type == 1 and not original_url:
+        raise ManifestError("转载稿件缺少 original_url")
+
+    title = _parse_str(row, "title")
+    desc = _parse_str(row, "desc", strip=False)
+
+    return {
+        "key": file_value,
+        "cover_key": cover_value,
+        "video": video_path,
+        "cover": cover_path,
+        "size": video_path.stat().st_size,
+        "title": title or video_path.stem,
+        "channel_id": _parse_int(row, "cid", 63),
+        "desc": desc,
+        "tags": [str(tag) for tag in tags],
+        "type": creation_type,
+        "original_url": original_url,
+        "priority": _parse_int(row, "priority", 0),
+        "deadline": _parse_deadline(row.get("deadline"))
+    }
+
+
+def iter_jobs(manifest_path, chunk_size: int = 200, check_media: bool = True, log=print):
+    """惰性产出有效任务
+
+    每次只读取 chunk_size 行，字段校验后用线程池并发校验视频容器，
+    无效行通过 log 输出后跳过
+    """
+    base_dir = Path(manifest_path).parent
+    rows = read_rows(manifest_path)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        jobs = []
+        for line_no, row in chunk:
+            try:
+                jobs.append((line_no, parse_row(row, base_dir)))
+            except ManifestError as e:
+                log(f"  ✗ 第 {line_no} 行: {e}")
+            except Exception as e:
+                # 单行的意外错误只跳过该行，不中断整个清单
+                log(f"  ✗ 第 {line_no} 行: 无法解析 ({type(e).__name__}: {e})")
+
+        if check_media and jobs:
+            media_infos = check_media_many([job["video"] for _, job in jobs])
+            for line_no, job in jobs:
+                media_info = media_infos[job["video"]]
+                if not media_info["ok"]:
+                    log(f"  ✗ 第 {line_no} 行: {job['video'].name} 文件损坏 ({media_info['error']})")
+                    continue
+                yield job
+        else:
+            for _, job in jobs:
+                yield job
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+上传前的视频容器快速校验
+纯 Python 解析 MP4/MOV、MKV/WebM、FLV 的容器结构，只做少量小块读取，
+在获取上传token之前拦截被截断或仍在写入的文件
+"""
+
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# moov / 头部元素的读取上限，超过视为异常文件
+MAX_HEADER_SIZE = 64 * 1024 * 1024
+# FLV onMetaData 的读取上限
+MAX_SCRIPT_SIZE = 1024 * 1024
+
+MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip", b"pnot", b"uuid"}
+# 分片 MP4 最多逐个读取的顶层 box 数，避免上千个 moof/mdat 在共享存储上产生上千次读取
+MAX_MP4_BOXES = 64
+
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_SEEKHEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_CUES = 0x1C53BB6B
+MKV_CLUSTER = 0x1F43B675
+
+
+class MediaCheckError(Exception):
+    """容器结构校验失败"""
+
+
+def _result(file_format=None, duration=None, width=None, height=None, error=None):
+    return {
+        "ok": error is None,
+        "format": file_format,
+        "duration": duration,
+        "width": width,
+        "height": height,
+        "error": error
+    }
+
+
+def _read_exact(f, offset: int, length: int) -> bytes:
+    """从指定位置读取固定长度，读不满视为截断"""
+    f.seek(offset)
+    data = f.read(length)
+    if len(data) < length:
+        raise MediaCheckError(f"文件在偏移 {offset} 处被截断")
+    return data
+
+
+# ---------------------------------------------------------------- MP4 / MOV
+
+def _iter_boxes(buf: bytes, start: int, end: int):
+    """遍历内存中的 box，返回 (类型, 数据起点, 数据终点)"""
+    pos = start
+    while pos + 8 <= end:
+        box_size, box_type = struct.unpack(">I4s", buf[pos:pos + 8])
+        header_size = 8
+        if box_size == 1:
+            if pos + 16 > end:
+                raise MediaCheckError("box 头部不完整")
+            box_size = struct.unpack(">Q", buf[pos + 8:pos + 16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = end - pos
+        if box_size < header_size or pos + box_size > end:
+            raise MediaCheckError(f"{box_type.decode('latin-1')} box 长度异常")
+        yield box_type, pos + header_size, pos + box_size
+        pos += box_size
+
+
+def _parse_moov(moov: bytes):
+    """从 moov 中读取时长和视频轨分辨率"""
+    duration = None
+    width = height = None
+
+    for box_type, start, end in _iter_boxes(moov, 0, len(moov)):
+        if box_type == b"mvhd":
+            version = moov[start]
+            if version == 1:
+                timescale, length = struct.unpack(">IQ", moov[start + 20:start + 32])
+            else:
+                timescale, length = struct.unpack(">II", moov[start + 12:start + 20])
+            if timescale:
+                duration = length / timescale
+        elif box_type == b"trak":
+            for sub_type, sub_start, sub_end in _iter_boxes(moov, start, end):
+                if sub_type != b"tkhd":
+                    continue
+                offset = sub_start + (88 if moov[sub_start] == 1 else 76)
+                if offset + 8 > sub_end:
+                    raise MediaCheckError("tkhd box 不完整")
+                track_width, track_height = struct.unpack(">II", moov[offset:offset + 8])
+                if track_width and track_height and width is None:
+                    width, height = track_width >> 16, track_height >> 16
+
+    return duration, width, height
+
+
+def _mfra_complete(f, file_size: int) -> bool:
+    """分片 MP4 末尾的 mfro 指向完整的 mfra 时，说明文件已写完"""
+    if file_size < 16:
+        return False
+    tail = _read_exact(f, file_size - 16, 16)
+    if tail[4:8] != b"mfro":
+        return False
+    mfra_size = struct.unpack(">I", tail[12:16])[0]
+    if mfra_size < 16 or mfra_size > file_size:
+        return False
+    header = _read_exact(f, file_size - mfra_size, 8)
+    return header == struct.pack(">I4s", mfra_size, b"mfra")
+
+
+def _probe_mp4(f, file_size: int) -> dict:
+    """逐个读取顶层 box 头部，确认 moov/mdat 完整
+
+    分片 MP4 (moov 之后是成对的 moof/mdat) 遇到第一个 moof 时先检查末尾的 mfra 索引，
+    完整则不再逐个读取；没有 mfra 时最多读取 MAX_MP4_BOXES 个顶层 box，
+    此后的分片不做截断校验
+    """
+    offset = 0
+    found = set()
+    moov = None
+    boxes = 0
+    mfra_checked = False
+
+    while offset < file_size:
+        if moov is not None and b"moof" in found:
+            if not mfra_checked:
+                mfra_checked = True
+                if _mfra_complete(f, file_size):
+                    break
+            if boxes >= MAX_MP4_BOXES:
+                break
+        header = _read_exact(f, offset, 8)
+        box_size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", _read_exact(f, offset + 8, 8))[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = file_size - offset
+
+        name = box_type.decode("latin-1")
+        if box_size < header_size:
+            raise MediaCheckError(f"{name} box 长度异常")
+        if offset + box_size > file_size:
+            raise MediaCheckError(f"{name} box 被截断 (缺少 {offset + box_size - file_size} 字节)")
+
+        if box_type == b"moov":
+            if box_size > MAX_HEADER_SIZE:
+                raise MediaCheckError("moov box 过大")
+            moov = _read_exact(f, offset + header_size, box_size - header_size)
+
+        found.add(box_type)
+        boxes += 1
+        offset += box_size
+
+    if moov is None:
+        raise MediaCheckError("缺少 moov 索引 (文件可能仍在写入或被截断)")
+    if b"mdat" not in found and b"moof" not in found:
+        raise MediaCheckError("缺少 mdat 数据")
+
+    duration, width, height = _parse_moov(moov)
+    file_format = "mp4" if b"ftyp" in found else "mov"
+    return _result(file_format, duration, width, height)
+
+
+# ---------------------------------------------------------------- MKV / WebM
+
+def _read_vint(buf: bytes, pos: int, keep_marker: bool):
+    """读取 EBML 变长整数，返回 (值, 长度)，未知长度返回 None"""
+    if pos >= len(buf):
+        raise MediaCheckError("EBML 数据不完整")
+    first = buf[pos]
+    if first == 0:
+        raise MediaCheckError("EBML 变长整数无效")
+    length = 9 - first.bit_length()
+    if pos + length > len(buf):
+        raise MediaCheckError("EBML 数据不完整")
+
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _read_element_header(buf: bytes, pos: int):
+    element_id, id_length = _read_vint(buf, pos, True)
+    size, size_length = _read_vint(buf, pos + id_length, False)
+    return element_id, size, pos + id_length + size_length
+
+
+def _iter_elements(buf: bytes, start: int, end: int):
+    """遍历内存中的 EBML 子元素，返回 (ID, 数据起点, 数据终点)"""
+    pos = start
+    while pos < end:
+        element_id, size, data_start = _read_element_header(buf, pos)
+        if size is None or data_start + size > end:
+            raise MediaCheckError("EBML 元素长度异常")
+        yield element_id, data_start, data_start + size
+        pos = data_start + size
+
+
+def _read_uint(buf: bytes, start: int, end: int) -> int:
+    return int.from_bytes(buf[start:end], "big")
+
+
+def _parse_mkv_info(buf: bytes):
+    timecode_scale = 1000000
+    duration = None
+    for element_id, start, end in _iter_elements(buf, 0, len(buf)):
+        if element_id == MKV_TIMECODE_SCALE:
+            timecode_scale = _read_uint(buf, start, end)
+        elif element_id == MKV_DURATION:
+            duration = struct.unpack(">f" if end - start == 4 else ">d", buf[start:end])[0]
+    if duration is None:
+        return None
+    return duration * timecode_scale / 1e9
+
+
+def _parse_mkv_tracks(buf: bytes):
+    for element_id, start, end in _iter_elements(buf, 0, len(buf)):
+        if element_id != MKV_TRACK_ENTRY:
+            continue
+        track_type = None
+        width = height = None
+        for sub_id, sub_start, sub_end in _iter_elements(buf, start, end):
+            if sub_id == MKV_TRACK_TYPE:
+                track_type = _read_uint(buf, sub_start, sub_end)
+            elif sub_id == MKV_VIDEO:
+                for video_id, video_start, video_end in _iter_elements(buf, sub_start, sub_end):
+                    if video_id == MKV_PIXEL_WIDTH:
+                        width = _read_uint(buf, video_start, video_end)
+                    elif video_id == MKV_PIXEL_HEIGHT:
+                        height = _read_uint(buf, video_start, video_end)
+        if track_type == 1:
+            return width, height
+    return None, None
+
+
+def _parse_mkv_seekhead(buf: bytes) -> dict:
+    positions = {}
+    for element_id, start, end in _iter_elements(buf, 0, len(buf)):
+        if element_id != MKV_SEEK:
+            continue
+        seek_id = seek_position = None
+        for sub_id, sub_start, sub_end in _iter_elements(buf, start, end):
+            if sub_id == MKV_SEEK_ID:
+                seek_id = _read_uint(buf, sub_start, sub_end)
+            elif sub_id == MKV_SEEK_POSITION:
+                seek_position = _read_uint(buf, sub_start, sub_end)
+        if seek_id is not None and seek_position is not None:
+            positions[seek_id] = seek_position
+    return positions
+
+
+def _read_file_element(f, offset: int):
+    """从文件读取元素头部，返回 (ID, 长度, 数据起点)"""
+    f.seek(offset)
+    header = f.read(12)
+    element_id, size, data_start = _read_element_header(header, 0)
+    return element_id, size, offset + data_start
+
+
+def _probe_mkv(f, file_size: int) -> dict:
+    """校验 EBML 头和 Segment 长度，并通过 SeekHead 确认 Cues 索引存在于文件中"""
+    element_id, size, data_start = _read_file_element(f, 0)
+    if size is None or size > MAX_HEADER_SIZE:
+        raise MediaCheckError("EBML 头长度异常")
+    header = _read_exact(f, data_start, size)
+    doc_type = "mkv"
+    for sub_id, start, end in _iter_elements(header, 0, len(header)):
+        if sub_id == EBML_DOCTYPE:
+            doc_type = "webm" if header[start:end].rstrip(b"\0") == b"webm" else "mkv"
+
+    element_id, segment_size, segment_start = _read_file_element(f, data_start + size)
+    if element_id != MKV_SEGMENT:
+        raise MediaCheckError("缺少 Segment 元素")
+    if segment_size is not None and segment_start + segment_size > file_size:
+        raise MediaCheckError(f"Segment 被截断 (缺少 {segment_start + segment_size - file_size} 字节)")
+
+    duration = None
+    width = height = None
+    seek_positions = {}
+    offset = segment_start
+    while offset < file_size:
+        element_id, size, data_start = _read_file_element(f, offset)
+        if element_id == MKV_CLUSTER or size is None:
+            break
+        if element_id in (MKV_SEEKHEAD, MKV_INFO, MKV_TRACKS):
+            if size > MAX_HEADER_SIZE:
+                raise MediaCheckError("Segment 头部元素过大")
+            body = _read_exact(f, data_start, size)
+            if element_id == MKV_SEEKHEAD:
+                seek_positions.update(_parse_mkv_seekhead(body))
+            elif element_id == MKV_INFO:
+                duration = _parse_mkv_info(body)
+            else:
+                width, height = _parse_mkv_tracks(body)
+        offset = data_start + size
+
+    if MKV_CUES in seek_positions:
+        cues_offset = segment_start + seek_positions[MKV_CUES]
+        if cues_offset >= file_size:
+            raise MediaCheckError("Cues 索引位于文件末尾之外 (文件被截断)")
+        element_id, size, data_start = _read_file_element(f, cues_offset)
+        if element_id != MKV_CUES:
+            raise MediaCheckError("Cues 索引位置无效")
+        if size is None or data_start + size > file_size:
+            raise MediaCheckError("Cues 索引被截断")
+    elif segment_size is None:
+        raise MediaCheckError("缺少 Cues 索引且 Segment 长度未知 (文件可能仍在写入)")
+
+    return _result(doc_type, duration, width, height)
+
+
+# ---------------------------------------------------------------- FLV
+
+def _read_amf_value(buf: bytes, pos: int):
+    """读取一个 AMF0 值，返回 (值, 新位置)"""
+    marker = buf[pos]
+    pos += 1
+    if marker == 0x00:
+        return struct.unpack(">d", buf[pos:pos + 8])[0], pos + 8
+    if marker == 0x01:
+        return buf[pos] != 0, pos + 1
+    if marker == 0x02:
+        length = struct.unpack(">H", buf[pos:pos + 2])[0]
+        return buf[pos + 2:pos + 2 + length].decode("utf-8", "replace"), pos + 2 + length
+    if marker in (0x03, 0x08):
+        if marker == 0x08:
+            pos += 4
+        values = {}
+        while pos + 3 <= len(buf):
+            length = struct.unpack(">H", buf[pos:pos + 2])[0]
+            if length == 0 and buf[pos + 2] == 0x09:
+                return values, pos + 3
+            key = buf[pos + 2:pos + 2 + length].decode("utf-8", "replace")
+            values[key], pos = _read_amf_value(buf, pos + 2 + length)
+        raise MediaCheckError("onMetaData 不完整")
+    if marker in (0x05, 0x06):
+        return None, pos
+    if marker == 0x0A:
+        count = struct.unpack(">I", buf[pos:pos + 4])[0]
+        pos += 4
+        values = []
+        for _ in range(count):
+            value, pos = _read_amf_value(buf, pos)
+            values.append(value)
+        return values, pos
+    if marker == 0x0B:
+        return struct.unpack(">d", buf[pos:pos + 8])[0], pos + 10
+    if marker == 0x0C:
+        length = struct.unpack(">I", buf[pos:pos + 4])[0]
+        return buf[pos + 4:pos + 4 + length].decode("utf-8", "replace"), pos + 4 + length
+    raise MediaCheckError(f"不支持的 AMF0 类型: {marker}")
+
+
+def _probe_flv(f, file_size: int) -> dict:
+    """读取 onMetaData，并根据末尾的 PreviousTagSize 校验最后一个 tag 完整"""
+    header = _read_exact(f, 0, 9)
+    data_offset = struct.unpack(">I", header[5:9])[0]
+    first_tag = data_offset + 4
+    if first_tag + 11 > file_size:
+        raise MediaCheckError("FLV 不包含任何 tag")
+
+    duration = None
+    width = height = None
+    tag_header = _read_exact(f, first_tag, 11)
+    if tag_header[0] & 0x1F == 18:
+        data_size = int.from_bytes(tag_header[1:4], "big")
+        if data_size <= MAX_SCRIPT_SIZE:
+            script = _read_exact(f, first_tag + 11, data_size)
+            try:
+                name, pos = _read_amf_value(script, 0)
+                if name == "onMetaData":
+                    metadata, _ = _read_amf_value(script, pos)
+                    if isinstance(metadata, dict):
+                        duration = metadata.get("duration")
+                        width = metadata.get("width")
+                        height = metadata.get("height")
+            except (IndexError, struct.error):
+                raise MediaCheckError("onMetaData 不完整")
+
+    last_tag_size = struct.unpack(">I", _read_exact(f, file_size - 4, 4))[0]
+    last_tag = file_size - 4 - last_tag_size
+    if last_tag_size < 11 or last_tag < first_tag:
+        raise MediaCheckError("文件尾部不完整 (文件可能仍在写入或被截断)")
+    tag_header = _read_exact(f, last_tag, 11)
+    if tag_header[0] & 0x1F not in (8, 9, 18) or int.from_bytes(tag_header[1:4], "big") != last_tag_size - 11:
+        raise MediaCheckError("文件尾部不完整 (文件可能仍在写入或被截断)")
+
+    return _result(
+        "flv", duration,
+        int(width) if width else None,
+        int(height) if height else None
+    )
+
+
+# ---------------------------------------------------------------- 入口
+
+@lru_cache(maxsize=4096)
+def _check_cached(path: str, file_size: int, mtime_ns: int) -> dict:
+    """按 (路径, 大小, 修改时间) 缓存校验结果，文件变化后自动失效"""
+    if file_size == 0:
+        return _result(error="文件为空")
+
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(12)
+            if magic[:4] == EBML_HEADER.to_bytes(4, "big"):
+                return _probe_mkv(f, file_size)
+            if magic[:3] == b"FLV":
+                return _probe_flv(f, file_size)
+            if magic[4:8] in MP4_TOP_LEVEL:
+                return _probe_mp4(f, file_size)
+    except MediaCheckError as e:
+        return _result(error=str(e))
+    except (IndexError, struct.error, ValueError) as e:
+        return _result(error=f"容器结构解析失败: {e}")
+
+    # 其他格式 (AVI/WMV 等) 不做结构校验，交由服务端处理
+    return _result()
+
+
+def check_media(path) -> dict:
+    """校验视频容器结构
+
+    返回 {"ok", "format", "duration", "width", "height", "error"}，
+    format 为 None 表示该格式未做结构校验
+    """
+    path = os.path.abspath(str(path))
+    try:
+        stat = os.stat(path)
+        return _check_cached(path, stat.st_size, stat.st_mtime_ns)
+    except OSError as e:
+        # 权限不足或网络存储 EIO 等读取错误，异常结果不进入缓存，下次重新校验
+        return _result(error=f"无法读取文件: {e}")
+
+
+def check_media_many(paths, max_workers: int = 4) -> dict:
+    """使用线程池批量校验，返回 {路径: 校验结果}"""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(check_media, paths)
+        return dict(zip(paths, results))
+
+
+def describe(result: dict) -> str:
+    """格式化校验结果用于日志输出"""
+    if not result["ok"]:
+        return result["error"]
+    if result["format"] is None:
+        return "未校验的格式"
+    parts = [result["format"]]
+    if result["width"] and result["height"]:
+        parts.append(f"{result['width']}x{result['height']}")
+    if result["duration"]:
+        parts.append(f"{result['duration']:.1f}秒")
+    return " ".join(parts)
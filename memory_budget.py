@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程级的在途内存预算
+分块读取、封面上传等在分配缓冲区之前先申请字节数，上传完成后归还；
+等待者按任务轮转获得预算，避免单个任务的分块长期占满预算
+"""
+
+import re
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    """解析 512M / 2G / 1048576 形式的字节数"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"无效的字节数: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+class ByteBudget:
+    """字节预算信号量，limit 为 0 表示不限制"""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.available = limit
+        self._cond = threading.Condition()
+        # 任务 -> 等待队列，队首任务的队首请求优先获得预算
+        self._queues = OrderedDict()
+
+    def configure(self, limit: int):
+        """调整预算上限，已借出的字节数保持不变"""
+        with self._cond:
+            self.available += limit - self.limit
+            self.limit = limit
+            self._cond.notify_all()
+
+    def _is_next(self, job, ticket) -> bool:
+        first_job = next(iter(self._queues))
+        return first_job == job and self._queues[job][0] is ticket
+
+    def acquire(self, nbytes: int, job=None) -> int:
+        """阻塞直到获得 nbytes 字节预算，返回实际占用的字节数
+
+        单次申请超过上限时按上限占用，保证大分块仍能独占预算完成
+        """
+        with self._cond:
+            if self.limit <= 0:
+                return 0
+            nbytes = min(nbytes, self.limit)
+            ticket = object()
+            self._queues.setdefault(job, deque()).append(ticket)
+            while not (self._is_next(job, ticket) and self.available >= nbytes):
+                self._cond.wait()
+
+            # 获得预算后该任务移到队尾，其他任务的等待者轮流获得预算
+            queue = self._queues.pop(job)
+            queue.popleft()
+            if queue:
+                self._queues[job] = queue
+            self.available -= nbytes
+            self._cond.notify_all()
+            return nbytes
+
+    def release(self, nbytes: int):
+        if nbytes <= 0:
+            return
+        with self._cond:
+            self.available += nbytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int, job=None):
+        granted = self.acquire(nbytes, job)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+
+# 进程内所有上传共用的预算
+global_budget = ByteBudget()
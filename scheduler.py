@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量上传的任务调度
+任务按字节数和实测吞吐量估算耗时，支持以下策略：
+  fifo      按文件名顺序 (原有行为)
+  sjf       短任务优先，降低平均发布等待时间
+  largest   大任务优先，多个并发上传时更容易占满带宽
+  deadline  按优先级、截止时间排序
+并可模拟各策略下的平均发布时间，便于根据数据选择
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+POLICIES = ("fifo", "sjf", "largest", "deadline")
+
+# JobQueue.claim 使用的排序，与 _sort_key 保持一致
+SQL_ORDER = {
+    "fifo": "id",
+    "sjf": "size, id",
+    "largest": "size DESC, id",
+    "deadline": "priority DESC, deadline IS NULL, deadline, size, id"
+}
+
+
+def _sort_key(policy: str, job: dict, seq: int) -> tuple:
+    size = job.get("size", 0)
+    if policy == "sjf":
+        return (size, seq)
+    if policy == "largest":
+        return (-size, seq)
+    if policy == "deadline":
+        deadline = job.get("deadline")
+        return (-job.get("priority", 0), deadline is None, deadline or 0, size, seq)
+    return (seq,)
+
+
+class ThroughputEstimator:
+    """根据实测上传耗时估算任务时长：固定开销 + 字节数 / 吞吐量 (指数加权平均)"""
+
+    def __init__(self, throughput: float = 2 * 1024 * 1024, overhead: float = 10, alpha: float = 0.3):
+        self.throughput = throughput
+        self.overhead = overhead
+        self.alpha = alpha
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, nbytes: int) -> float:
+        return self.overhead + nbytes / self.throughput
+
+    def observe(self, nbytes: int, seconds: float):
+        """记录一次完成的上传"""
+        if nbytes <= 0 or seconds <= 0:
+            return
+        sample = nbytes / max(seconds - self.overhead, 1)
+        with self._lock:
+            if self.samples == 0:
+                self.throughput = sample
+            else:
+                self.throughput = self.alpha * sample + (1 - self.alpha) * self.throughput
+            self.samples += 1
+
+    def load(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.throughput = data.get("throughput", self.throughput)
+        self.samples = data.get("samples", self.samples)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"throughput": self.throughput, "samples": self.samples}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+class Scheduler:
+    """线程安全的任务队列，按策略决定出队顺序
+
+    流式输入时生产者用 wait_below 控制队列长度，全部推入后调用 finish；
+    此时排序只在队列中已有的任务之间进行
+    """
+
+    def __init__(self, policy: str = "fifo"):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的调度策略: {policy}")
+        self.policy = policy
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.finished = False
+
+    def push(self, job: dict):
+        with self._cond:
+            seq = next(self._seq)
+            heapq.heappush(self._heap, (_sort_key(self.policy, job, seq), seq, job))
+            self._cond.notify_all()
+
+    def pop(self, block: bool = False) -> dict:
+        """取出下一个任务，队列为空或已关闭时返回 None
+
+        block 为 True 时在生产者调用 finish 之前等待新任务
+        """
+        with self._cond:
+            while block and not self._heap and not self.closed and not self.finished:
+                self._cond.wait()
+            if self.closed or not self._heap:
+                return None
+            job = heapq.heappop(self._heap)[2]
+            self._cond.notify_all()
+            return job
+
+    def wait_below(self, size: int):
+        """阻塞直到队列长度小于 size 或队列已关闭"""
+        with self._cond:
+            while len(self._heap) >= size and not self.closed:
+                self._cond.wait()
+
+    def finish(self):
+        """不再有新任务推入"""
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def close(self):
+        """停止分发剩余任务"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+
+def simulate(jobs: list, policy: str, estimator: ThroughputEstimator, workers: int = 1,
+             now: float = None) -> dict:
+    """按估算耗时模拟调度，返回平均/最大发布时间(相对开始时刻的秒数)和错过截止时间的任务数
+
+    任务的 deadline 为时间戳
+    """
+    if now is None:
+        now = time.time()
+    scheduler = Scheduler(policy)
+    for job in jobs:
+        scheduler.push(job)
+
+    free_at = [0.0] * max(1, workers)
+    publish_times = []
+    missed = 0
+    while True:
+        job = scheduler.pop()
+        if job is None:
+            break
+        start = heapq.heappop(free_at)
+        finish = start + estimator.estimate(job.get("size", 0))
+        heapq.heappush(free_at, finish)
+        publish_times.append(finish)
+        if job.get("deadline") is not None and now + finish > job["deadline"]:
+            missed += 1
+
+    if not publish_times:
+        return {"mean": 0.0, "max": 0.0, "missed": 0}
+    return {
+        "mean": sum(publish_times) / len(publish_times),
+        "max": max(publish_times),
+        "missed": missed
+    }
+
+
+def compare_policies(jobs: list, estimator: ThroughputEstimator, workers: int = 1) -> dict:
+    now = time.time()
+    return {policy: simulate(jobs, policy, estimator, workers, now) for policy in POLICIES}
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}时{minutes:02d}分"
+    return f"{minutes}分{seconds:02d}秒"
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+投稿后的稿件状态跟踪
+每次投稿成功后记录 dougaId/videoId 到任务数据库，由单个轮询进程批量查询稿件列表，
+按自适应间隔退避，并对请求速率设置硬上限，最终状态写回数据库
+"""
+
+import argparse
+import json
+import threading
+import time
+
+from job_queue import connect
+
+# 稿件状态
+PROCESSING = "processing"    # 转码或审核中
+PUBLISHED = "published"      # 已发布
+REJECTED = "rejected"        # 审核未通过
+EXPIRED = "expired"          # 超过跟踪期限仍未得到最终状态
+
+FINAL_STATES = (PUBLISHED, REJECTED, EXPIRED)
+
+# 创作中心稿件列表返回的 status，未列出的取值按处理中继续跟踪
+CONTRIBUTE_STATUS = {
+    1: PROCESSING,
+    2: PUBLISHED,
+    3: REJECTED
+}
+
+CONTRIBUTE_LIST_URL = "https://member.acfun.cn/list/api/queryContributeList"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    douga_id TEXT PRIMARY KEY,
+    video_ids TEXT NOT NULL,
+    title TEXT,
+    job_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'processing',
+    raw_status TEXT,
+    poll_count INTEGER NOT NULL DEFAULT 0,
+    next_poll_at REAL NOT NULL,
+    submitted_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS submissions_due ON submissions (status, next_poll_at);
+"""
+
+
+class RateLimiter:
+    """令牌桶，保证请求速率不超过 rate 次/秒"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+class SubmissionTracker:
+    """任务数据库中的 submissions 表"""
+
+    def __init__(self, db_path: str, initial_interval: float = 60, max_interval: float = 3600,
+                 max_age: float = 7 * 86400):
+        self.db_path = db_path
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.max_age = max_age
+
+        with connect(self.db_path) as conn:
+            conn.executescript(SCHEMA)
+
+    def next_interval(self, poll_count: int) -> float:
+        """刚投稿的稿件状态变化快，间隔较短；之后指数退避到 max_interval"""
+        return min(self.initial_interval * (2 ** poll_count), self.max_interval)
+
+    def record(self, douga_id, video_ids: list, title: str = "", job_id: int = None):
+        """记录一次成功的投稿"""
+        now = time.time()
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO submissions "
+                "(douga_id, video_ids, title, job_id, next_poll_at, submitted_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(douga_id), json.dumps(video_ids), title, job_id,
+                 now + self.initial_interval, now, now)
+            )
+
+    def due(self, limit: int = 500) -> list:
+        """到期需要查询的稿件"""
+        placeholders = ", ".join("?" * len(FINAL_STATES))
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM submissions WHERE status NOT IN ({placeholders}) AND next_poll_at <= ? "
+                "ORDER BY next_poll_at LIMIT ?",
+                (*FINAL_STATES, time.time(), limit)
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+    def outstanding_ids(self) -> set:
+        """所有尚未得到最终状态的稿件"""
+        placeholders = ", ".join("?" * len(FINAL_STATES))
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT douga_id FROM submissions WHERE status NOT IN ({placeholders})", FINAL_STATES
+            ).fetchall()
+            return {row["douga_id"] for row in rows}
+
+    def outstanding(self, douga_ids: set) -> list:
+        """douga_ids 中尚未得到最终状态的稿件"""
+        douga_ids = list(douga_ids)
+        placeholders = ", ".join("?" * len(FINAL_STATES))
+        submissions = []
+        with connect(self.db_path) as conn:
+            # 分批查询，避免超过 SQLite 的参数个数限制
+            for start in range(0, len(douga_ids), 500):
+                batch = douga_ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM submissions WHERE status NOT IN ({placeholders}) "
+                    f"AND douga_id IN ({', '.join('?' * len(batch))})",
+                    (*FINAL_STATES, *batch)
+                ).fetchall()
+                submissions += [dict(row) for row in rows]
+        return submissions
+
+    def next_due_at(self) -> float:
+        """最近一次需要查询的时间，没有待跟踪的稿件时返回 None"""
+        placeholders = ", ".join("?" * len(FINAL_STATES))
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                f"SELECT MIN(next_poll_at) AS t FROM submissions WHERE status NOT IN ({placeholders})",
+                FINAL_STATES
+            ).fetchone()
+            return row["t"]
+
+    def update(self, submissions: list, statuses: dict):
+        """批量写回查询结果，statuses 为 {dougaId: 原始状态}，未查到的稿件只推迟下次查询"""
+        now = time.time()
+        with connect(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for submission in submissions:
+                douga_id = submission["douga_id"]
+                raw_status = statuses.get(douga_id, submission["raw_status"])
+                status = CONTRIBUTE_STATUS.get(_to_int(raw_status), PROCESSING)
+                if status == PROCESSING and now - submission["submitted_at"] > self.max_age:
+                    status = EXPIRED
+
+                poll_count = submission["poll_count"] + 1
+                conn.execute(
+                    "UPDATE submissions SET status = ?, raw_status = ?, poll_count = ?, next_poll_at = ?, "
+                    "updated_at = ?, finished_at = ? WHERE douga_id = ?",
+                    (status, None if raw_status is None else str(raw_status), poll_count,
+                     now + self.next_interval(poll_count), now,
+                     now if status in FINAL_STATES else None, douga_id)
+                )
+            conn.execute("COMMIT")
+
+    def counts(self) -> dict:
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM submissions GROUP BY status").fetchall()
+            return {row["status"]: row["n"] for row in rows}
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StatusFetchError(Exception):
+    """稿件列表查询失败 (如cookie失效)，本轮结果不可用"""
+
+
+class StatusPoller:
+    """批量查询创作中心稿件列表，一次请求覆盖一页稿件，而不是每个稿件单独轮询"""
+
+    def __init__(self, uploader, tracker: SubmissionTracker, max_rps: float = 0.5,
+                 max_pages: int = 0, batch_size: int = 500):
+        self.uploader = uploader
+        self.tracker = tracker
+        self.limiter = RateLimiter(max_rps)
+        self.max_pages = max_pages
+        self.batch_size = batch_size
+        # 连续查询失败的次数及下次重试时间，失败期间不推进各稿件的查询计划
+        self.failures = 0
+        self.retry_at = 0
+
+    def fetch_statuses(self, douga_ids: set, tracked: set = None) -> dict:
+        """从最新的稿件开始翻页，直到找齐 douga_ids 或已翻过其中最早的稿件
+
+        AC号按投稿先后递增，页内出现比待查稿件中最小的AC号更小的稿件时，更早的页不会再有待查稿件；
+        max_pages 大于 0 时另外限制每轮的页数。翻页途中遇到的 tracked 中的稿件也一并返回，
+        但不影响何时停止。查询失败时抛出 StatusFetchError
+        """
+        tracked = set(douga_ids) | set(tracked or ())
+        statuses = {}
+        numeric_ids = [_to_int(douga_id) for douga_id in douga_ids]
+        oldest = None if None in numeric_ids or not numeric_ids else min(numeric_ids)
+        pcursor = ""
+        page = 0
+        while not self.max_pages or page < self.max_pages:
+            page += 1
+            self.limiter.acquire()
+            response = self.uploader.session.post(
+                CONTRIBUTE_LIST_URL,
+                data={
+                    "pcursor": pcursor,
+                    "resourceType": 1,
+                    "sortType": 3,
+                    "status": 0,
+                    "keyword": ""
+                }
+            )
+            result = response.json()
+            if result.get("result") != 0:
+                raise StatusFetchError(f"查询稿件列表失败: {response.text}")
+
+            passed_oldest = False
+            for item in result.get("feed", []):
+                douga_id = str(item.get("dougaId") or item.get("resourceId") or "")
+                if douga_id in tracked:
+                    statuses[douga_id] = item.get("status")
+                item_id = _to_int(douga_id)
+                if oldest is not None and item_id is not None and item_id < oldest:
+                    passed_oldest = True
+
+            pcursor = result.get("pcursor")
+            if (douga_ids.issubset(statuses) or passed_oldest
+                    or not pcursor or pcursor == "no_more"):
+                break
+        return statuses
+
+    def poll_once(self) -> int:
+        """查询一批到期的稿件，返回本次处理的到期稿件数量
+
+        翻页时看到的其他未完成稿件 (尚未到期或超出本批) 也按查到的状态更新，
+        相当于提前完成了一次查询，不必在到期后再单独翻页
+        """
+        submissions = self.tracker.due(self.batch_size)
+        if not submissions:
+            return 0
+
+        due_ids = {s["douga_id"] for s in submissions}
+        tracked = self.tracker.outstanding_ids()
+        try:
+            statuses = self.fetch_statuses(due_ids, tracked)
+        except Exception as e:
+            # 查询本身失败时不推进各稿件的查询计划，整体退避后重试
+            wait = self.tracker.next_interval(self.failures)
+            self.failures += 1
+            self.retry_at = time.time() + wait
+            self.uploader.log(f"查询稿件状态出错: {e}，{int(wait)}秒后重试")
+            return 0
+        self.failures = 0
+        seen = self.tracker.outstanding(set(statuses) - due_ids)
+        self.tracker.update(submissions + seen, statuses)
+
+        for douga_id, raw_status in statuses.items():
+            status = CONTRIBUTE_STATUS.get(_to_int(raw_status), PROCESSING)
+            if status != PROCESSING:
+                self.uploader.log(f"AC{douga_id}: {status}")
+        return len(submissions)
+
+    def run(self, forever: bool = False):
+        """持续轮询直到没有待跟踪的稿件 (forever 时一直等待新的投稿)"""
+        while True:
+            if self.retry_at > time.time():
+                time.sleep(self.retry_at - time.time())
+            if self.poll_once():
+                continue
+
+            next_due = self.tracker.next_due_at()
+            if next_due is None and not forever:
+                return
+            wait = self.tracker.initial_interval if next_due is None else next_due - time.time()
+            time.sleep(max(1, min(wait, self.tracker.max_interval)))
+
+
+def main():
+    from acfun_cli import AcFunUploader
+
+    parser = argparse.ArgumentParser(description="跟踪已投稿稿件的审核/发布状态")
+    parser.add_argument("db", help="任务数据库路径")
+    parser.add_argument("--cookie_file", default="cookies/ac_cookies.txt", help="Cookie文件路径")
+    parser.add_argument("--max_rps", type=float, default=0.5, help="每秒最多请求次数")
+    parser.add_argument("--max_pages", type=int, default=0,
+                        help="每轮最多翻阅的稿件列表页数 (默认不限制，翻过最早的待查稿件即停止)")
+    parser.add_argument("--forever", action="store_true", help="没有待跟踪稿件时继续等待新的投稿")
+    args = parser.parse_args()
+
+    uploader = AcFunUploader()
+    if not uploader.load_cookies(args.cookie_file):
+        print("Cookie无效，请先使用 acfun_cli.py 登录")
+        return
+
+    tracker = SubmissionTracker(args.db)
+    poller = StatusPoller(uploader, tracker, args.max_rps, args.max_pages)
+    try:
+        poller.run(args.forever)
+    except KeyboardInterrupt:
+        print("\n已停止跟踪")
+
+    counts = tracker.counts()
+    print(f"处理中: {counts.get(PROCESSING, 0)}  已发布: {counts.get(PUBLISHED, 0)}  "
+          f"未通过: {counts.get(REJECTED, 0)}  已过期: {counts.get(EXPIRED, 0)}")
+
+
+if __name__ == "__main__":
+    main()
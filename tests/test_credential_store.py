@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CredentialStore 与 AcFunUploader.ensure_login 的单次登录行为测试
+运行: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acfun_cli import AcFunUploader  # noqa: E402
+from credential_store import CredentialStore  # noqa: E402
+
+
+class EnsureLoginTest(unittest.TestCase):
+    WORKERS = 4
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cookie_file = os.path.join(self.tmp.name, "cookies", "ac_cookies.txt")
+        os.makedirs(os.path.dirname(self.cookie_file))
+        with open(self.cookie_file, "w", encoding="utf-8") as f:
+            json.dump([{"name": "auth", "value": "expired"}], f)
+
+        self.logins = 0
+        self.credential_requests = 0
+        self.counter_lock = threading.Lock()
+
+    def make_uploader(self, login_ok: bool) -> AcFunUploader:
+        uploader = AcFunUploader()
+        uploader.log = lambda *msg: None
+        uploader.cookie_ttl = 0
+
+        def test_login():
+            return uploader.session.cookies.get("auth") == "fresh"
+
+        def login(username, password):
+            with self.counter_lock:
+                self.logins += 1
+            if login_ok:
+                uploader.session.cookies.set("auth", "fresh")
+            return login_ok
+
+        uploader.test_login = test_login
+        uploader.login = login
+        return uploader
+
+    def get_credentials(self):
+        with self.counter_lock:
+            self.credential_requests += 1
+        return "user", "password"
+
+    def run_workers(self, login_ok: bool) -> list:
+        results = [None] * self.WORKERS
+        barrier = threading.Barrier(self.WORKERS)
+
+        def worker(index):
+            uploader = self.make_uploader(login_ok)
+            barrier.wait()
+            results[index] = uploader.ensure_login(self.cookie_file, self.get_credentials)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_successful_login_is_shared(self):
+        results = self.run_workers(login_ok=True)
+        self.assertEqual(results, [True] * self.WORKERS)
+        self.assertEqual(self.logins, 1)
+
+    def test_failed_login_is_not_repeated_by_waiters(self):
+        results = self.run_workers(login_ok=False)
+        self.assertEqual(results, [False] * self.WORKERS)
+        self.assertEqual(self.logins, 1)
+        self.assertEqual(self.credential_requests, 1)
+
+
+class CredentialStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CredentialStore(os.path.join(self.tmp.name, "c.txt"), ttl=600, failure_ttl=300)
+
+    def test_failure_is_scoped_to_fingerprint(self):
+        self.store.mark_failed("abc")
+        self.assertTrue(self.store.recently_failed("abc"))
+        self.assertFalse(self.store.recently_failed("def"))
+        self.assertFalse(self.store.is_fresh("anything"))
+
+    def test_successful_write_clears_failure(self):
+        self.store.mark_failed(None)
+        self.store.write([{"name": "auth", "value": "fresh"}])
+        self.assertFalse(self.store.recently_failed(None))
+        self.assertTrue(self.store.is_fresh(self.store.read()))
+
+
+if __name__ == "__main__":
+    unittest.main()
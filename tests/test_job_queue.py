@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+job_queue 的租约、接管与投稿栅栏行为测试
+运行: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import CLAIMED, DONE, FAILED, PENDING, SUBMITTING, JobQueue  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class JobQueueTest(unittest.TestCase):
+    LEASE = 60
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "jobs.db")
+        self.clock = FakeClock()
+        patcher = mock.patch("job_queue.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.node_a = self.make_queue("node-a")
+        self.node_b = self.make_queue("node-b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_queue(self, node_id: str, max_attempts: int = 3) -> JobQueue:
+        return JobQueue(self.db_path, node_id=node_id, lease_seconds=self.LEASE,
+                        max_attempts=max_attempts)
+
+    def add_job(self, key: str = "a.mp4") -> None:
+        self.assertTrue(self.node_a.add(key, {"file": key}))
+
+    def test_claim_takes_each_job_once(self):
+        self.add_job("a.mp4")
+        self.add_job("b.mp4")
+
+        first = self.node_a.claim()
+        second = self.node_b.claim()
+        self.assertEqual({first["job_key"], second["job_key"]}, {"a.mp4", "b.mp4"})
+        self.assertEqual(first["status"], CLAIMED)
+        self.assertEqual(first["attempts"], 1)
+        self.assertIsNone(self.node_a.claim())
+        self.assertIsNone(self.node_b.claim())
+
+    def test_add_ignores_existing_key(self):
+        self.add_job("a.mp4")
+        self.assertFalse(self.node_b.add("a.mp4", {"file": "a.mp4"}))
+        self.assertEqual(self.node_a.counts(), {PENDING: 1})
+
+    def test_live_lease_is_not_taken_over(self):
+        self.add_job()
+        self.node_a.claim()
+
+        self.clock.advance(self.LEASE - 1)
+        self.assertIsNone(self.node_b.claim())
+
+        self.assertTrue(self.node_a.renew(1))
+        self.clock.advance(self.LEASE - 1)
+        self.assertIsNone(self.node_b.claim())
+
+    def test_expired_lease_is_taken_over(self):
+        self.add_job()
+        self.node_a.claim()
+
+        self.clock.advance(self.LEASE + 1)
+        job = self.node_b.claim()
+        self.assertIsNotNone(job)
+        self.assertEqual(job["owner"], "node-b")
+        self.assertEqual(job["attempts"], 2)
+
+        # 原节点的续约、投稿和完成都会被拒绝
+        self.assertFalse(self.node_a.renew(job["id"]))
+        self.assertFalse(self.node_a.begin_submit(job["id"]))
+        self.assertFalse(self.node_a.complete(job["id"], 123))
+        self.assertEqual(self.node_a.get(job["id"])["owner"], "node-b")
+
+    def test_begin_submit_refused_after_own_lease_expired(self):
+        self.add_job()
+        job = self.node_a.claim()
+
+        self.clock.advance(self.LEASE + 1)
+        self.assertFalse(self.node_a.begin_submit(job["id"]))
+        self.assertEqual(self.node_a.get(job["id"])["status"], CLAIMED)
+
+    def test_submitting_job_is_never_reclaimed(self):
+        self.add_job()
+        job = self.node_a.claim()
+        self.assertTrue(self.node_a.begin_submit(job["id"]))
+        self.assertEqual(self.node_a.get(job["id"])["status"], SUBMITTING)
+
+        self.clock.advance(self.LEASE * 100)
+        self.assertIsNone(self.node_b.claim())
+        self.assertIsNone(self.node_b.next_lease_expiry())
+
+        self.assertTrue(self.node_a.complete(job["id"], 123))
+        finished = self.node_a.get(job["id"])
+        self.assertEqual(finished["status"], DONE)
+        self.assertEqual(finished["douga_id"], "123")
+
+    def test_fail_while_claimed_requeues_until_max_attempts(self):
+        self.add_job()
+        for attempt in range(1, 4):
+            job = self.node_a.claim()
+            self.assertEqual(job["attempts"], attempt)
+            self.node_a.fail(job["id"], "上传失败")
+
+            expected = PENDING if attempt < 3 else FAILED
+            self.assertEqual(self.node_a.get(job["id"])["status"], expected)
+        self.assertIsNone(self.node_a.claim())
+
+    def test_fail_while_submitting_is_final(self):
+        self.add_job()
+        job = self.node_a.claim()
+        self.assertTrue(self.node_a.begin_submit(job["id"]))
+
+        self.node_a.fail(job["id"], "投稿结果未知")
+        failed = self.node_a.get(job["id"])
+        self.assertEqual(failed["status"], FAILED)
+        self.assertEqual(failed["error"], "投稿结果未知")
+        self.assertIsNone(self.node_b.claim())
+
+    def test_fail_from_non_owner_is_ignored(self):
+        self.add_job()
+        job = self.node_a.claim()
+
+        self.node_b.fail(job["id"], "不是我的任务")
+        self.assertEqual(self.node_a.get(job["id"])["status"], CLAIMED)
+
+    def test_expired_lease_at_max_attempts_is_marked_failed(self):
+        node_a = self.make_queue("node-a", max_attempts=2)
+        node_b = self.make_queue("node-b", max_attempts=2)
+        self.add_job()
+
+        node_a.claim()
+        self.clock.advance(self.LEASE + 1)
+        job = node_b.claim()
+        self.assertEqual(job["attempts"], 2)
+
+        # 第二个节点也崩溃，租约过期后不再接管
+        self.clock.advance(self.LEASE + 1)
+        self.assertIsNone(node_a.claim())
+        failed = node_a.get(job["id"])
+        self.assertEqual(failed["status"], FAILED)
+        self.assertIsNone(failed["owner"])
+
+    def test_next_lease_expiry_tracks_claimed_jobs(self):
+        self.assertIsNone(self.node_a.next_lease_expiry())
+        self.add_job("a.mp4")
+        self.add_job("b.mp4")
+
+        self.node_a.claim()
+        self.clock.advance(10)
+        self.node_b.claim()
+        self.assertEqual(self.node_a.next_lease_expiry(), self.clock.now - 10 + self.LEASE)
+
+
+if __name__ == "__main__":
+    unittest.main()
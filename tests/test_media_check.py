@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+media_check 的 MP4/MKV/FLV 容器校验测试，使用内存中构造的最小容器
+运行: python -m unittest discover tests
+"""
+
+import errno
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import media_check  # noqa: E402
+from media_check import check_media, check_media_many  # noqa: E402
+
+
+# ---------------------------------------------------------------- MP4
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mp4_moov(timescale: int = 1000, duration: int = 5000, width: int = 1280, height: int = 720) -> bytes:
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", timescale, duration) + b"\0" * 80)
+    tkhd = box(b"tkhd", b"\0" * 76 + struct.pack(">II", width << 16, height << 16))
+    return box(b"moov", mvhd + box(b"trak", tkhd))
+
+
+FTYP = box(b"ftyp", b"isom\0\0\0\0isommp41")
+MDAT = box(b"mdat", b"\x55" * 1000)
+
+
+# ---------------------------------------------------------------- MKV
+
+def ebml_id(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def element(element_id: int, payload: bytes = b"", unknown_size: bool = False) -> bytes:
+    size = b"\x01\xff\xff\xff\xff\xff\xff\xff" if unknown_size else b"\x01" + len(payload).to_bytes(7, "big")
+    return ebml_id(element_id) + size + payload
+
+
+def uint_element(element_id: int, value: int) -> bytes:
+    return element(element_id, value.to_bytes(8, "big"))
+
+
+def mkv_file(with_cues: bool = True, unknown_size: bool = False, doc_type: bytes = b"webm") -> bytes:
+    header = element(media_check.EBML_HEADER, element(media_check.EBML_DOCTYPE, doc_type))
+    info = element(
+        media_check.MKV_INFO,
+        uint_element(media_check.MKV_TIMECODE_SCALE, 1000000)
+        + element(media_check.MKV_DURATION, struct.pack(">d", 2500.0))
+    )
+    video = element(
+        media_check.MKV_VIDEO,
+        uint_element(media_check.MKV_PIXEL_WIDTH, 640) + uint_element(media_check.MKV_PIXEL_HEIGHT, 360)
+    )
+    tracks = element(
+        media_check.MKV_TRACKS,
+        element(media_check.MKV_TRACK_ENTRY, uint_element(media_check.MKV_TRACK_TYPE, 1) + video)
+    )
+    cluster = element(media_check.MKV_CLUSTER, b"\0" * 500)
+    cues = element(media_check.MKV_CUES, b"\0" * 32)
+
+    def seekhead(cues_position: int) -> bytes:
+        if not with_cues:
+            return b""
+        seek = element(
+            media_check.MKV_SEEK,
+            element(media_check.MKV_SEEK_ID, ebml_id(media_check.MKV_CUES))
+            + uint_element(media_check.MKV_SEEK_POSITION, cues_position)
+        )
+        return element(media_check.MKV_SEEKHEAD, seek)
+
+    # SeekHead 长度与位置取值无关，先按 0 计算 Cues 的相对位置
+    body = seekhead(0) + info + tracks + cluster
+    body = seekhead(len(body)) + info + tracks + cluster
+    if with_cues:
+        body += cues
+    return header + element(media_check.MKV_SEGMENT, body, unknown_size)
+
+
+# ---------------------------------------------------------------- FLV
+
+def flv_tag(tag_type: int, data: bytes) -> bytes:
+    header = bytes([tag_type]) + len(data).to_bytes(3, "big") + b"\0" * 7
+    return header + data + struct.pack(">I", 11 + len(data))
+
+
+def amf_string(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return b"\x02" + struct.pack(">H", len(raw)) + raw
+
+
+def flv_file() -> bytes:
+    entries = b""
+    for key, value in (("duration", 12.5), ("width", 1920.0), ("height", 1080.0)):
+        raw = key.encode("utf-8")
+        entries += struct.pack(">H", len(raw)) + raw + b"\x00" + struct.pack(">d", value)
+    metadata = amf_string("onMetaData") + b"\x08" + struct.pack(">I", 3) + entries + b"\0\0\x09"
+    header = b"FLV\x01\x05" + struct.pack(">I", 9) + b"\0\0\0\0"
+    return header + flv_tag(18, metadata) + flv_tag(9, b"\x17" + b"\0" * 200) + flv_tag(8, b"\xaf" + b"\0" * 50)
+
+
+class MediaCheckTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.counter = 0
+
+    def write(self, data: bytes, suffix: str) -> str:
+        self.counter += 1
+        path = os.path.join(self.tmp.name, f"sample{self.counter}{suffix}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def assertBroken(self, result: dict, message: str):
+        self.assertFalse(result["ok"], result)
+        self.assertIn(message, result["error"])
+
+
+class Mp4Test(MediaCheckTestCase):
+    def test_valid_file(self):
+        result = check_media(self.write(FTYP + mp4_moov() + MDAT, ".mp4"))
+        self.assertTrue(result["ok"], result)
+        self.assertEqual(result["format"], "mp4")
+        self.assertEqual(result["duration"], 5.0)
+        self.assertEqual((result["width"], result["height"]), (1280, 720))
+
+    def test_moov_at_end(self):
+        result = check_media(self.write(FTYP + MDAT + mp4_moov(), ".mp4"))
+        self.assertTrue(result["ok"], result)
+
+    def test_truncated_in_mdat(self):
+        data = FTYP + mp4_moov() + MDAT
+        self.assertBroken(check_media(self.write(data[:-100], ".mp4")), "mdat box 被截断")
+
+    def test_truncated_in_moov(self):
+        data = FTYP + MDAT + mp4_moov()
+        self.assertBroken(check_media(self.write(data[:-40], ".mp4")), "moov box 被截断")
+
+    def test_missing_moov(self):
+        self.assertBroken(check_media(self.write(FTYP + MDAT, ".mp4")), "缺少 moov")
+
+    def test_size_zero_mdat_extends_to_end(self):
+        mdat = struct.pack(">I4s", 0, b"mdat") + b"\x55" * 300
+        result = check_media(self.write(FTYP + mp4_moov() + mdat, ".mp4"))
+        self.assertTrue(result["ok"], result)
+
+    def test_fragmented_reads_are_capped(self):
+        fragments = (box(b"moof", b"\0" * 16) + box(b"mdat", b"\0" * 16)) * 2000
+        path = self.write(FTYP + mp4_moov() + fragments, ".mp4")
+        with mock.patch("media_check._read_exact", wraps=media_check._read_exact) as read:
+            result = check_media(path)
+        self.assertTrue(result["ok"], result)
+        self.assertLessEqual(read.call_count, media_check.MAX_MP4_BOXES + 4)
+
+    def test_fragmented_with_mfra_stops_at_first_fragment(self):
+        mfro = box(b"mfro", b"\0" * 4 + struct.pack(">I", 8 + 16))
+        mfra = box(b"mfra", mfro)
+        fragments = (box(b"moof", b"\0" * 16) + box(b"mdat", b"\0" * 16)) * 500
+        path = self.write(FTYP + mp4_moov() + fragments + mfra, ".mp4")
+        with mock.patch("media_check._read_exact", wraps=media_check._read_exact) as read:
+            result = check_media(path)
+        self.assertTrue(result["ok"], result)
+        self.assertLessEqual(read.call_count, 8)
+
+    def test_fragmented_truncated_within_cap(self):
+        fragments = (box(b"moof", b"\0" * 16) + box(b"mdat", b"\0" * 16)) * 4
+        data = FTYP + mp4_moov() + fragments
+        self.assertBroken(check_media(self.write(data[:-5], ".mp4")), "mdat box 被截断")
+
+
+class MkvTest(MediaCheckTestCase):
+    def test_valid_file(self):
+        result = check_media(self.write(mkv_file(), ".webm"))
+        self.assertTrue(result["ok"], result)
+        self.assertEqual(result["format"], "webm")
+        self.assertEqual(result["duration"], 2.5)
+        self.assertEqual((result["width"], result["height"]), (640, 360))
+
+    def test_truncated_segment(self):
+        data = mkv_file(doc_type=b"matroska")
+        self.assertBroken(check_media(self.write(data[:-10], ".mkv")), "Segment 被截断")
+
+    def test_unknown_segment_size_with_cues(self):
+        result = check_media(self.write(mkv_file(unknown_size=True), ".mkv"))
+        self.assertTrue(result["ok"], result)
+
+    def test_unknown_segment_size_with_cues_cut_off(self):
+        data = mkv_file(unknown_size=True)
+        self.assertBroken(check_media(self.write(data[:-60], ".mkv")), "Cues")
+
+    def test_unknown_segment_size_without_cues(self):
+        data = mkv_file(with_cues=False, unknown_size=True)
+        self.assertBroken(check_media(self.write(data, ".mkv")), "缺少 Cues 索引且 Segment 长度未知")
+
+    def test_known_segment_size_without_cues(self):
+        result = check_media(self.write(mkv_file(with_cues=False), ".mkv"))
+        self.assertTrue(result["ok"], result)
+
+
+class FlvTest(MediaCheckTestCase):
+    def test_valid_file(self):
+        result = check_media(self.write(flv_file(), ".flv"))
+        self.assertTrue(result["ok"], result)
+        self.assertEqual(result["format"], "flv")
+        self.assertEqual(result["duration"], 12.5)
+        self.assertEqual((result["width"], result["height"]), (1920, 1080))
+
+    def test_truncated_tail(self):
+        data = flv_file()
+        self.assertBroken(check_media(self.write(data[:-3], ".flv")), "文件尾部不完整")
+
+    def test_mismatched_previous_tag_size(self):
+        data = flv_file()[:-4] + struct.pack(">I", 40)
+        self.assertBroken(check_media(self.write(data, ".flv")), "文件尾部不完整")
+
+    def test_amf_values(self):
+        buf = b"\x03" + struct.pack(">H", 1) + b"a" + b"\x01\x01" + struct.pack(">H", 1) + b"b" \
+            + b"\x0a" + struct.pack(">I", 2) + b"\x05" + amf_string("x") + b"\0\0\x09"
+        value, pos = media_check._read_amf_value(buf, 0)
+        self.assertEqual(value, {"a": True, "b": [None, "x"]})
+        self.assertEqual(pos, len(buf))
+
+
+class CheckMediaTest(MediaCheckTestCase):
+    def test_empty_and_unknown_formats(self):
+        self.assertBroken(check_media(self.write(b"", ".mp4")), "文件为空")
+        result = check_media(self.write(b"RIFF" + b"\0" * 100, ".avi"))
+        self.assertTrue(result["ok"])
+        self.assertIsNone(result["format"])
+
+    def test_read_error_is_reported_and_not_cached(self):
+        path = self.write(FTYP + mp4_moov() + MDAT, ".mp4")
+        error = OSError(errno.EIO, "Input/output error")
+        with mock.patch("media_check.open", side_effect=error, create=True):
+            results = check_media_many([path, path])
+        self.assertBroken(results[path], "无法读取文件")
+        self.assertTrue(check_media(path)["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+StatusPoller 翻页查询与 SubmissionTracker 写回的测试
+运行: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import connect  # noqa: E402
+from status_tracker import PROCESSING, PUBLISHED, REJECTED, StatusPoller, SubmissionTracker  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, data: dict):
+        self.data = data
+        self.text = str(data)
+
+    def json(self) -> dict:
+        return self.data
+
+
+class FakeSession:
+    """按 pcursor 返回预先准备好的稿件列表分页"""
+
+    def __init__(self, pages: list):
+        self.pages = pages
+        self.requests = 0
+
+    def post(self, url, data=None):
+        self.requests += 1
+        index = int(data["pcursor"] or 0)
+        pcursor = str(index + 1) if index + 1 < len(self.pages) else "no_more"
+        return FakeResponse({"result": 0, "feed": self.pages[index], "pcursor": pcursor})
+
+
+class FakeUploader:
+    def __init__(self, pages: list):
+        self.session = FakeSession(pages)
+        self.messages = []
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+class StatusPollerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.tracker = SubmissionTracker(os.path.join(self.tmp.name, "jobs.db"), initial_interval=60)
+
+    def make_due(self, *douga_ids):
+        with connect(self.tracker.db_path) as conn:
+            conn.executemany(
+                "UPDATE submissions SET next_poll_at = ? WHERE douga_id = ?",
+                [(time.time() - 1, douga_id) for douga_id in douga_ids]
+            )
+
+    def statuses(self) -> dict:
+        with connect(self.tracker.db_path) as conn:
+            rows = conn.execute("SELECT douga_id, status, poll_count FROM submissions").fetchall()
+            return {row["douga_id"]: (row["status"], row["poll_count"]) for row in rows}
+
+    def test_updates_outstanding_submissions_seen_while_paging(self):
+        for douga_id in (101, 102, 103, 104):
+            self.tracker.record(douga_id, [douga_id])
+        # 只有 102 到期，103/104 在同一页上已有结果
+        self.make_due("102")
+        uploader = FakeUploader([
+            [{"dougaId": 104, "status": 2}, {"dougaId": 103, "status": 1}],
+            [{"dougaId": 102, "status": 3}, {"dougaId": 101, "status": 2}],
+            [{"dougaId": 100, "status": 2}]
+        ])
+
+        poller = StatusPoller(uploader, self.tracker, max_rps=1000)
+        self.assertEqual(poller.poll_once(), 1)
+
+        # 找到到期的 102 后即停止翻页，101 所在页已读到因此一并更新
+        self.assertEqual(uploader.session.requests, 2)
+        self.assertEqual(self.statuses(), {
+            "101": (PUBLISHED, 1),
+            "102": (REJECTED, 1),
+            "103": (PROCESSING, 1),
+            "104": (PUBLISHED, 1)
+        })
+
+    def test_final_submissions_are_not_updated_again(self):
+        self.tracker.record(201, [201])
+        self.tracker.record(202, [202])
+        self.make_due("201", "202")
+        poller = StatusPoller(FakeUploader([[{"dougaId": 202, "status": 2}, {"dougaId": 201, "status": 1}]]),
+                              self.tracker, max_rps=1000)
+        poller.poll_once()
+
+        # 202 已发布，之后即使出现在翻页结果中也不再写回
+        self.make_due("201")
+        poller.uploader.session.pages = [[{"dougaId": 202, "status": 3}, {"dougaId": 201, "status": 2}]]
+        poller.poll_once()
+        self.assertEqual(self.statuses(), {"201": (PUBLISHED, 2), "202": (PUBLISHED, 1)})
+
+
+if __name__ == "__main__":
+    unittest.main()
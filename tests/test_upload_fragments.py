@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AcFunUploader.upload_fragments 的在途内存预算测试
+运行: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acfun_cli import AcFunUploader  # noqa: E402
+from memory_budget import ByteBudget  # noqa: E402
+
+PART_SIZE = 1024 * 1024
+
+
+class UploadFragmentsBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.received = {}
+        self.lock = threading.Lock()
+
+    def write_file(self, name: str, parts: int) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            for index in range(parts):
+                f.write(bytes([index % 256]) * PART_SIZE)
+        return path
+
+    def make_uploader(self, budget_parts: int, fragment_workers: int) -> AcFunUploader:
+        uploader = AcFunUploader()
+        uploader.log = lambda *msg: None
+        uploader.fragment_workers = fragment_workers
+        uploader.byte_budget = ByteBudget(budget_parts * PART_SIZE)
+
+        def upload_chunk(block, fragment_id, upload_token):
+            # 偶数分块较慢，奇数分块先完成
+            if fragment_id % 2 == 0:
+                time.sleep(0.05)
+            with self.lock:
+                self.received[(upload_token, fragment_id)] = block[0]
+            return True
+
+        uploader.upload_chunk = upload_chunk
+        return uploader
+
+    def measure_peak(self, func) -> float:
+        """返回执行期间新分配内存的峰值 (以分块数计)"""
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return (peak - baseline) / PART_SIZE
+
+    def test_peak_stays_within_budget(self):
+        path = self.write_file("video.mp4", 12)
+        uploader = self.make_uploader(budget_parts=2, fragment_workers=4)
+
+        results = []
+        peak = self.measure_peak(
+            lambda: results.append(uploader.upload_fragments(path, PART_SIZE, 12, "token"))
+        )
+        self.assertEqual(results, [True])
+        self.assertEqual(len(self.received), 12)
+        self.assertLess(peak, 2.5)
+
+    def test_peak_stays_within_budget_across_parts(self):
+        paths = [self.write_file(f"p{index}.mp4", 6) for index in range(3)]
+        uploader = self.make_uploader(budget_parts=2, fragment_workers=4)
+
+        def upload_all():
+            with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+                futures = [
+                    executor.submit(uploader.upload_fragments, path, PART_SIZE, 6, path)
+                    for path in paths
+                ]
+                self.assertTrue(all(future.result() for future in futures))
+
+        peak = self.measure_peak(upload_all)
+        self.assertEqual(len(self.received), 18)
+        self.assertLess(peak, 2.5)
+        self.assertEqual(uploader.byte_budget.available, uploader.byte_budget.limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
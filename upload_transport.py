@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分块上传使用的 HTTP 传输层
+http1 为基于 requests 的连接池；http2 使用 httpx 在单个连接上多路复用并发的分块请求，
+未安装 httpx[http2]、服务端不支持 HTTP/2 或 HTTP/2 连接/协议失败时自动回退到 http1
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:
+    httpx = None
+
+TRANSPORT_MODES = ("http1", "http2", "auto")
+
+# HTTP/2 禁止携带的逐跳请求头
+_HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+
+class Http2ProtocolError(requests.exceptions.ConnectionError):
+    """HTTP/2 连接、TLS 握手失败或协议错误，通常说明服务端或中间设备不支持 HTTP/2"""
+
+
+def http2_available() -> bool:
+    """当前环境是否安装了 HTTP/2 依赖"""
+    return httpx is not None
+
+
+class Http1Transport:
+    """requests 连接池，每个并发请求占用一个 TCP+TLS 连接"""
+
+    http_version = "HTTP/1.1"
+
+    def __init__(self, pool_size: int = 16):
+        self.session = requests.Session()
+        self.pool_size = 0
+        self.resize(pool_size)
+
+    def resize(self, pool_size: int):
+        """按并发请求数重建连接池，连接池小于并发数时多出的连接用完即被丢弃"""
+        # 配置重试策略
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool_size = pool_size
+
+    def post(self, url: str, params: dict = None, data: bytes = None, headers: dict = None,
+             timeout: tuple = None, verify: bool = True):
+        return self.session.post(
+            url,
+            params=params,
+            data=data,
+            headers=headers,
+            timeout=timeout,
+            verify=verify
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class Http2Transport:
+    """httpx HTTP/2 客户端，并发请求在同一连接上多路复用"""
+
+    http_version = "HTTP/2"
+
+    def __init__(self, prior_knowledge: bool = False):
+        if httpx is None:
+            raise RuntimeError("HTTP/2 需要安装 httpx[http2]")
+        # prior_knowledge 用于明文 h2c，仅本地测试服务器使用
+        self.prior_knowledge = prior_knowledge
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self, verify: bool):
+        # verify 是 httpx 客户端级别的配置，按需分别创建
+        with self._lock:
+            if verify not in self._clients:
+                self._clients[verify] = httpx.Client(
+                    http1=not self.prior_knowledge,
+                    http2=True,
+                    verify=verify
+                )
+            return self._clients[verify]
+
+    def post(self, url: str, params: dict = None, data: bytes = None, headers: dict = None,
+             timeout: tuple = None, verify: bool = True):
+        if headers:
+            headers = {k: v for k, v in headers.items() if k.lower() not in _HOP_BY_HOP_HEADERS}
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+        # 连接/TLS 握手失败和协议错误说明 HTTP/2 不可用，转换为 Http2ProtocolError 由 UploadTransport 回退；
+        # 超时等其他错误转换为 requests 的异常类型，交给调用方原有的重试逻辑
+        try:
+            return self._get_client(verify).post(
+                url,
+                params=params,
+                content=data,
+                headers=headers,
+                timeout=timeout
+            )
+        except (httpx.ConnectError, httpx.RemoteProtocolError, httpx.LocalProtocolError) as e:
+            raise Http2ProtocolError(f"{type(e).__name__}: {e}")
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+class UploadTransport:
+    """按配置选择传输层，HTTP/2 不可用时自动回退到 HTTP/1.1"""
+
+    def __init__(self, mode: str = "http1", pool_size: int = 16, log=None,
+                 prior_knowledge: bool = False):
+        if mode not in TRANSPORT_MODES:
+            raise ValueError(f"未知的传输方式: {mode}")
+        self.log = log or (lambda *msg: None)
+        self.http1 = Http1Transport(pool_size)
+        self.http2 = None
+
+        if mode in ("http2", "auto"):
+            if http2_available():
+                self.http2 = Http2Transport(prior_knowledge)
+            elif mode == "http2":
+                self.log("未安装 httpx[http2]，分块上传回退到 HTTP/1.1")
+
+    def ensure_pool_size(self, pool_size: int):
+        """连接池至少容纳 pool_size 个并发请求，应在开始上传前调用"""
+        if pool_size > self.http1.pool_size:
+            self.http1.resize(pool_size)
+
+    @property
+    def http_version(self) -> str:
+        return (self.http2 or self.http1).http_version
+
+    def _fallback(self, reason: str):
+        if self.http2 is not None:
+            self.log(f"HTTP/2 不可用 ({reason})，分块上传回退到 HTTP/1.1")
+            # 其他线程可能仍在使用该连接，不主动关闭
+            self.http2 = None
+
+    def post(self, url: str, params: dict = None, data: bytes = None, headers: dict = None,
+             timeout: tuple = None, verify: bool = True):
+        """发送 POST 请求，返回带有 status_code 和 json() 的响应对象"""
+        http2 = self.http2
+        if http2 is not None:
+            try:
+                response = http2.post(url, params, data, headers, timeout, verify)
+            except Http2ProtocolError as e:
+                self._fallback(str(e))
+            else:
+                if response.http_version != "HTTP/2":
+                    # ALPN 协商结果为 HTTP/1.1，改用连接池更高效的 requests
+                    self._fallback(f"服务端协商为 {response.http_version}")
+                return response
+
+        return self.http1.post(url, params, data, headers, timeout, verify)
+
+    def close(self):
+        if self.http2 is not None:
+            self.http2.close()
+        self.http1.close()